@@ -0,0 +1,365 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Union
+
+import numpy as np
+
+BENCH_VERSION = 1
+STAGES = ["load", "feateng", "train", "hypersearch"]
+MODELS = ["logit", "tree", "forest", "knn"]
+DEFAULT_ROWS = [10000, 100000]
+DEFAULT_SCALERS = ["none", "standard"]
+DEFAULT_DIMREDUCTS = ["none", "pca"]
+DEFAULT_ENGINES = ["fast"]
+DEFAULT_BUDGET = 2
+KEY_FIELDS = ["stage", "rows", "cache", "model", "scaler", "dimreduct", "feateng"]
+REGRESSION_THRESHOLD = 0.1
+# differences below these values are treated as noise
+NOISE = {"seconds": 0.05, "peak_mb": 5.0}
+TRACKING_VARIABLE = "MLFLOW_TRACKING_URI"
+
+
+def measure(
+    func: Callable[[], Any], repeat: int, memory: bool
+) -> tuple[Any, float, Union[float, None]]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return result, min(timings), peak
+
+
+def describe(result: dict[str, Any]) -> str:
+    return " ".join(
+        f"{key}={result[key]}" for key in KEY_FIELDS if result.get(key) is not None
+    )
+
+
+def bench_config(defaults: dict[str, Any], workdir: str, jobs: int) -> dict[str, Any]:
+    return {
+        **defaults,
+        "loadpath": os.path.join(workdir, "data.csv"),
+        "dumppath": os.path.join(workdir, "model.joblib"),
+        "cachedir": os.path.join(workdir, "cache"),
+        "jobs": jobs,
+        "logmodel": False,
+    }
+
+
+def run_benchmark(
+    defaults: dict[str, Any],
+    rows: list[int],
+    stages: list[str],
+    models: list[str],
+    scalers: list[str],
+    dimreducts: list[str],
+    engines: list[str],
+    repeat: int = 1,
+    memory: bool = True,
+    jobs: int = 1,
+    budget: int = DEFAULT_BUDGET,
+    output: Callable[[str], None] = print,
+) -> dict[str, Any]:
+    import pandas as pd
+    import sklearn
+    from .synthetic import write_dataset, TARGET_COLUMN
+    from .datahandler import load_data, dataset_fingerprint
+    from .featureeng import make_new_features
+    from .models import create_model
+    from .pipeline import create_pipeline
+    from .train import train
+    from .hypersearch import hypersearch
+    from .tracking import flush
+
+    workdir = tempfile.mkdtemp(prefix="forest_cover_bench")
+    # keep benchmark runs out of the user's MLflow experiments
+    tracking_uri = os.environ.get(TRACKING_VARIABLE)
+    os.environ[TRACKING_VARIABLE] = Path(workdir, "mlruns").as_uri()
+    config = bench_config(defaults, workdir, jobs)
+    results: list[dict[str, Any]] = []
+
+    def record(result: dict[str, Any], func: Callable[[], Any]) -> Any:
+        results.append(result)
+        try:
+            value, seconds, peak = measure(func, repeat, memory)
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+            output(f"{describe(result)}: ошибка: {result['error']}")
+            return None
+        result.update(
+            seconds=round(seconds, 4),
+            peak_mb=None if peak is None else round(peak, 1),
+        )
+        output(
+            f"{describe(result)}: {round(seconds, 3)} с"
+            + ("" if peak is None else f", пик памяти {round(peak, 1)} МБ")
+        )
+        return value
+
+    def load_cold() -> Any:
+        cache_dir = tempfile.mkdtemp(dir=workdir)
+        try:
+            return load_data(config["loadpath"], TARGET_COLUMN, cache_dir)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    try:
+        for count in rows:
+            write_dataset(config["loadpath"], count, config["randomstate"])
+            shutil.rmtree(config["cachedir"], ignore_errors=True)
+            data = load_data(config["loadpath"], TARGET_COLUMN, config["cachedir"])
+            if "load" in stages:
+                record({"stage": "load", "rows": count, "cache": False}, load_cold)
+                record(
+                    {"stage": "load", "rows": count, "cache": True},
+                    lambda: load_data(
+                        config["loadpath"], TARGET_COLUMN, config["cachedir"]
+                    ),
+                )
+            if "feateng" in stages:
+                data_hash = dataset_fingerprint(data[0])
+                for engine in engines:
+                    record(
+                        {"stage": "feateng", "rows": count, "feateng": engine},
+                        lambda: make_new_features(
+                            data[0],
+                            None,
+                            data_hash,
+                            engine,
+                            config["corrthreshold"],
+                            config["corrmemory"] * 2**20,
+                        ),
+                    )
+            for model, scaler, dimreduct in itertools.product(
+                models, scalers, dimreducts
+            ):
+                combination = {"model": model, "scaler": scaler, "dimreduct": dimreduct}
+                run = {**config, **combination}
+                key = {"rows": count, **combination}
+                if "train" in stages:
+                    scores = record(
+                        {"stage": "train", **key},
+                        lambda: train(
+                            create_pipeline(scaler, dimreduct, create_model(model)),
+                            data,
+                            {},
+                            run,
+                        ),
+                    )
+                    if scores is not None:
+                        results[-1]["accuracy"] = round(
+                            float(np.mean(scores["test_balanced_accuracy"])), 4
+                        )
+                    flush()
+                if "hypersearch" in stages:
+                    record(
+                        {"stage": "hypersearch", **key},
+                        lambda: hypersearch(run, data, {}, "random", budget),
+                    )
+                    flush()
+    finally:
+        if tracking_uri is None:
+            del os.environ[TRACKING_VARIABLE]
+        else:
+            os.environ[TRACKING_VARIABLE] = tracking_uri
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "version": BENCH_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "jobs": jobs,
+            "repeat": repeat,
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+        },
+        "results": results,
+    }
+
+
+def result_key(result: dict[str, Any]) -> tuple[Any, ...]:
+    return tuple(result.get(key) for key in KEY_FIELDS)
+
+
+def compare_results(
+    base: dict[str, Any], new: dict[str, Any], threshold: float
+) -> tuple[list[str], int]:
+    previous = {result_key(result): result for result in base["results"]}
+    lines = []
+    regressions = 0
+    for result in new["results"]:
+        old = previous.get(result_key(result))
+        if old is None:
+            lines.append(f"{describe(result)}: нет в базовом файле")
+            continue
+        if "error" in result:
+            regressions += "error" not in old
+            lines.append(f"{describe(result)}: ошибка: {result['error']}")
+            continue
+        changes = []
+        regressed = False
+        for metric, unit in [("seconds", "с"), ("peak_mb", "МБ")]:
+            before, after = old.get(metric), result.get(metric)
+            if before is None or after is None:
+                continue
+            change = after / before - 1 if before > 0 else 0.0
+            changes.append(f"{before} -> {after} {unit} ({change:+.1%})")
+            if change > threshold and after - before > NOISE[metric]:
+                regressed = True
+        regressions += regressed
+        lines.append(
+            f"{describe(result)}: {', '.join(changes)}"
+            + (" РЕГРЕССИЯ" if regressed else "")
+        )
+    return lines, regressions
+
+
+def read_results(path: str) -> dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            results: dict[str, Any] = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Не найден файл результатов ({path})")
+    if results.get("version") != BENCH_VERSION:
+        raise ValueError(f"Неподдерживаемая версия файла результатов ({path})")
+    return results
+
+
+def main(argv: list[str], defaults: dict[str, Any]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="ml bench",
+        description="Замер времени и памяти загрузки, feature engineering, "
+        "обучения и подбора гиперпараметров на синтетических данных",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="провести замеры")
+    run_parser.add_argument(
+        "-o", "--output", default=None, help="файл JSON для результатов"
+    )
+    run_parser.add_argument(
+        "-r",
+        "--rows",
+        type=int,
+        nargs="+",
+        default=DEFAULT_ROWS,
+        help=f"размеры датасета в строках [по умолчанию: {DEFAULT_ROWS}]",
+    )
+    run_parser.add_argument(
+        "-s", "--stages", nargs="+", choices=STAGES, default=STAGES, help="этапы"
+    )
+    run_parser.add_argument(
+        "-m", "--models", nargs="+", choices=MODELS, default=MODELS, help="модели"
+    )
+    run_parser.add_argument(
+        "--scalers",
+        nargs="+",
+        choices=["none", "standard", "minmax", "maxabs", "robust"],
+        default=DEFAULT_SCALERS,
+        help=f"алгоритмы масштабирования [по умолчанию: {DEFAULT_SCALERS}]",
+    )
+    run_parser.add_argument(
+        "--dimreducts",
+        nargs="+",
+        choices=["none", "pca", "lda"],
+        default=DEFAULT_DIMREDUCTS,
+        help=f"алгоритмы снижения размерности [по умолчанию: {DEFAULT_DIMREDUCTS}]",
+    )
+    run_parser.add_argument(
+        "--feateng",
+        nargs="+",
+        choices=["fast", "auto"],
+        default=DEFAULT_ENGINES,
+        help=f"варианты feature engineering [по умолчанию: {DEFAULT_ENGINES}]",
+    )
+    run_parser.add_argument(
+        "-n",
+        "--repeat",
+        type=int,
+        default=1,
+        help="число повторов замера времени (берется лучший) [по умолчанию: 1]",
+    )
+    run_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="число ядер (см. njobs); память замеряется только в основном "
+        "процессе, поэтому точна при 1 [по умолчанию: 1]",
+    )
+    run_parser.add_argument(
+        "--budget",
+        type=int,
+        default=DEFAULT_BUDGET,
+        help=f"число кандидатов hypersearch (random) [по умолчанию: {DEFAULT_BUDGET}]",
+    )
+    run_parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="не замерять память (без дополнительного прогона под tracemalloc)",
+    )
+    compare_parser = subparsers.add_parser(
+        "compare", help="сравнить два файла результатов"
+    )
+    compare_parser.add_argument("base", help="базовый файл результатов")
+    compare_parser.add_argument("new", help="новый файл результатов")
+    compare_parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=REGRESSION_THRESHOLD,
+        help="допустимое ухудшение времени и памяти в долях "
+        f"[по умолчанию: {REGRESSION_THRESHOLD}]",
+    )
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        lines, regressions = compare_results(
+            read_results(args.base), read_results(args.new), args.threshold
+        )
+        print("\n".join(lines))
+        if regressions:
+            print(f"Регрессий: {regressions}", file=sys.stderr)
+            sys.exit(1)
+        return
+    if min(args.rows) < 1 or args.repeat < 1 or args.jobs < 0 or args.budget < 1:
+        parser.error("число строк, повторов и кандидатов должно быть положительным")
+    results = run_benchmark(
+        defaults,
+        args.rows,
+        args.stages,
+        args.models,
+        args.scalers,
+        args.dimreducts,
+        args.feateng,
+        args.repeat,
+        not args.no_memory,
+        args.jobs,
+        args.budget,
+        lambda message: print(message, file=sys.stderr),
+    )
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
@@ -0,0 +1,451 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Union
+
+import numpy as np
+import pandas as pd
+from joblib import Memory
+
+CACHE_VERSION = 6
+META_FILE = "meta.json"
+TARGET_FILE = "target.npy"
+DEFINITIONS_FILE = "features.json"
+MATRIX_FILE = "features.{}.bin"
+MATRIX_TARGET_FILE = "target.bin"
+TRANSFORMERS_DIR = "transformers"
+HITS_FILE = "hits.log"
+SHARED_DIR = "shared"
+SHARED_CHUNK_ROWS = 65536
+FINGERPRINT = "fingerprint"
+
+
+def cache_key(csv_path: str, target_column: str, variant: str) -> str:
+    stat = os.stat(csv_path)
+    source = f"{csv_path}|{stat.st_mtime_ns}|{stat.st_size}|{target_column}|{variant}"
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+def features_key(data_hash: str, *settings: Any) -> str:
+    source = "|".join([data_hash, *[str(setting) for setting in settings]])
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+def stored_fingerprint(features: pd.DataFrame) -> Union[str, None]:
+    stored = features.attrs.get(FINGERPRINT)
+    # attrs survive column and row selections, which change the data
+    if stored is None or tuple(stored[1]) != features.shape:
+        return None
+    return str(stored[0])
+
+
+def set_fingerprint(features: pd.DataFrame, fingerprint: Union[str, None]) -> None:
+    if fingerprint is not None:
+        features.attrs[FINGERPRINT] = fingerprint, features.shape
+
+
+def column_file(position: int) -> str:
+    return f"c{position}.npy"
+
+
+def matrix_file(dtype: str) -> str:
+    return MATRIX_FILE.format(np.dtype(dtype).str[1:])
+
+
+def matrix_blocks(dtypes: list[str]) -> dict[str, list[int]]:
+    blocks: dict[str, list[int]] = {}
+    for position, dtype in enumerate(dtypes):
+        blocks.setdefault(dtype, []).append(position)
+    return blocks
+
+
+def read_meta(entry: str) -> Union[dict[str, Any], None]:
+    try:
+        with open(os.path.join(entry, META_FILE), encoding="utf-8") as f:
+            meta: dict[str, Any] = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    return meta
+
+
+def save_array(path: str, values: pd.Series) -> Union[list[Any], None]:
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        np.save(path, values.cat.codes.to_numpy())
+        return list(values.cat.categories.tolist())
+    array = values.to_numpy()
+    np.save(path, array, allow_pickle=array.dtype == object)
+    return None
+
+
+def load_array(path: str, categories: Union[list[Any], None] = None) -> Any:
+    try:
+        array = np.load(path, mmap_mode="r")
+    except ValueError:
+        array = np.load(path, allow_pickle=True)
+    if categories is not None:
+        return pd.Categorical.from_codes(array, categories=categories)
+    return array
+
+
+def source_meta(csv_path: str, target_column: str, variant: str) -> dict[str, Any]:
+    stat = os.stat(csv_path)
+    return {
+        "csv": csv_path,
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "kind": "dataset",
+        "target": target_column,
+        "variant": variant,
+    }
+
+
+def open_entry(
+    cache_dir: str, csv_path: str, target_column: str, variant: str
+) -> tuple[str, str]:
+    entry = os.path.join(cache_dir, cache_key(csv_path, target_column, variant))
+    remove_stale(cache_dir, csv_path, target_column, variant)
+    return entry, open_staging(entry)
+
+
+def open_staging(entry: str) -> str:
+    staging = f"{entry}.tmp{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    return staging
+
+
+def close_entry(entry: str, staging: str, meta: dict[str, Any]) -> None:
+    meta = {"version": CACHE_VERSION, **meta, "created": time.time()}
+    with open(os.path.join(staging, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(staging, entry)
+
+
+def load_raw(path: str, dtype: str, shape: tuple[int, ...]) -> Any:
+    if 0 in shape:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+def read_cached(
+    cache_dir: str, csv_path: str, target_column: str, variant: str
+) -> Union[tuple[pd.DataFrame, pd.Series], None]:
+    entry = os.path.join(cache_dir, cache_key(csv_path, target_column, variant))
+    meta = read_meta(entry)
+    if meta is None:
+        return None
+    try:
+        if meta["layout"] == "matrix":
+            features, target = read_matrix(entry, meta)
+        else:
+            features = load_columns(entry, meta)
+            target_values = load_array(
+                os.path.join(entry, TARGET_FILE), meta["categories"].get(TARGET_FILE)
+            )
+            target = pd.Series(target_values, name=meta["target"], copy=False)
+    except OSError:
+        return None
+    set_fingerprint(features, meta[FINGERPRINT])
+    return features, target
+
+
+def load_columns(entry: str, meta: dict[str, Any]) -> pd.DataFrame:
+    columns = {
+        name: load_array(
+            os.path.join(entry, column_file(i)),
+            meta["categories"].get(column_file(i)),
+        )
+        for i, name in enumerate(meta["columns"])
+    }
+    return pd.DataFrame(columns, columns=meta["columns"], copy=False)
+
+
+def save_columns(
+    staging: str, features: pd.DataFrame, target: Union[pd.Series, None] = None
+) -> dict[str, list[Any]]:
+    arrays = [(column_file(i), features[name]) for i, name in enumerate(features)]
+    if target is not None:
+        arrays.append((TARGET_FILE, target))
+    categories = {}
+    for filename, values in arrays:
+        column_categories = save_array(os.path.join(staging, filename), values)
+        if column_categories is not None:
+            categories[filename] = column_categories
+    return categories
+
+
+def read_matrix(entry: str, meta: dict[str, Any]) -> tuple[pd.DataFrame, pd.Series]:
+    blocks = [
+        (
+            positions,
+            load_raw(
+                os.path.join(entry, matrix_file(dtype)),
+                dtype,
+                (meta["rows"], len(positions)),
+            ),
+        )
+        for dtype, positions in matrix_blocks(meta["dtypes"]).items()
+    ]
+    if len(blocks) == 1:
+        # a single block stays one matrix, so CV workers can map it directly
+        features = pd.DataFrame(blocks[0][1], columns=meta["columns"], copy=False)
+    else:
+        columns = {
+            position: block[:, i]
+            for positions, block in blocks
+            for i, position in enumerate(positions)
+        }
+        features = pd.DataFrame(
+            {name: columns[i] for i, name in enumerate(meta["columns"])},
+            columns=meta["columns"],
+            copy=False,
+        )
+    target_values = load_raw(
+        os.path.join(entry, MATRIX_TARGET_FILE), meta["target_dtype"], (meta["rows"],)
+    )
+    target = pd.Series(target_values, name=meta["target"], copy=False)
+    if meta["variant"] == "compact":
+        target = target.astype("category")
+    return features, target
+
+
+def write_cached(
+    cache_dir: str,
+    csv_path: str,
+    target_column: str,
+    variant: str,
+    features: pd.DataFrame,
+    target: pd.Series,
+    fingerprint: str,
+) -> None:
+    entry, staging = open_entry(cache_dir, csv_path, target_column, variant)
+    try:
+        categories = save_columns(staging, features, target)
+        close_entry(
+            entry,
+            staging,
+            {
+                **source_meta(csv_path, target_column, variant),
+                FINGERPRINT: fingerprint,
+                "layout": "columns",
+                "columns": [str(c) for c in features.columns],
+                "categories": categories,
+                "rows": len(features),
+            },
+        )
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def read_cached_features(cache_dir: str, key: str) -> Union[pd.DataFrame, None]:
+    entry = os.path.join(cache_dir, key)
+    meta = read_meta(entry)
+    if meta is None:
+        return None
+    try:
+        features = load_columns(entry, meta)
+    except OSError:
+        return None
+    set_fingerprint(features, key)
+    return features
+
+
+def write_cached_features(
+    cache_dir: str,
+    key: str,
+    features: pd.DataFrame,
+    definitions: str,
+    settings: dict[str, Any],
+) -> None:
+    entry = os.path.join(cache_dir, key)
+    staging = open_staging(entry)
+    try:
+        categories = save_columns(staging, features)
+        with open(os.path.join(staging, DEFINITIONS_FILE), "w", encoding="utf-8") as f:
+            f.write(definitions)
+        shutil.rmtree(entry, ignore_errors=True)
+        close_entry(
+            entry,
+            staging,
+            {
+                "kind": "features",
+                **settings,
+                "layout": "columns",
+                "columns": [str(c) for c in features.columns],
+                "categories": categories,
+                "rows": len(features),
+            },
+        )
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def remove_stale(
+    cache_dir: str, csv_path: str, target_column: str, variant: str
+) -> None:
+    for entry, meta in list_entries(cache_dir):
+        if meta["kind"] != "dataset":
+            continue
+        if (meta["csv"], meta["target"], meta["variant"]) == (
+            csv_path,
+            target_column,
+            variant,
+        ):
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def entry_size(entry: str) -> int:
+    return sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+
+
+def list_entries(cache_dir: str) -> list[tuple[str, dict[str, Any]]]:
+    if not os.path.isdir(cache_dir):
+        return []
+    entries = []
+    for name in sorted(os.listdir(cache_dir)):
+        entry = os.path.join(cache_dir, name)
+        meta = read_meta(entry)
+        if meta is not None:
+            entries.append((entry, meta))
+    return entries
+
+
+def clear_cache(cache_dir: str) -> int:
+    if not os.path.isdir(cache_dir):
+        return 0
+    removed = 0
+    for name in os.listdir(cache_dir):
+        entry = os.path.join(cache_dir, name)
+        if os.path.isdir(entry):
+            shutil.rmtree(entry, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def is_mapped(array: Any) -> bool:
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+def write_shared(location: str, features: pd.DataFrame) -> Union[dict[str, Any], None]:
+    kinds = {np.dtype(dtype).kind for dtype in features.dtypes}
+    if 0 in features.shape or not kinds <= set("biuf"):
+        return None
+    dtype = np.result_type(*features.dtypes)
+    os.makedirs(location, exist_ok=True)
+    handle, path = tempfile.mkstemp(suffix=".bin", dir=location)
+    try:
+        with os.fdopen(handle, "wb") as f:
+            for start in range(0, len(features), SHARED_CHUNK_ROWS):
+                stop = start + SHARED_CHUNK_ROWS
+                chunk = features.iloc[start:stop]
+                f.write(np.ascontiguousarray(chunk.to_numpy(dtype=dtype)).tobytes())
+    except BaseException:
+        remove_shared(path)
+        raise
+    return {
+        "path": path,
+        "dtype": dtype.str,
+        "rows": len(features),
+        "columns": [str(c) for c in features.columns],
+        FINGERPRINT: stored_fingerprint(features),
+    }
+
+
+def load_shared(shared: dict[str, Any]) -> Any:
+    return load_raw(
+        shared["path"], shared["dtype"], (shared["rows"], len(shared["columns"]))
+    )
+
+
+def read_shared(shared: dict[str, Any]) -> pd.DataFrame:
+    features = pd.DataFrame(load_shared(shared), columns=shared["columns"], copy=False)
+    set_fingerprint(features, shared[FINGERPRINT])
+    return features
+
+
+def remove_shared(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@contextmanager
+def shared_matrix(cache_dir: str, features: pd.DataFrame) -> Iterator[Any]:
+    if features.dtypes.nunique() == 1:
+        matrix = features.to_numpy()
+        if matrix.flags["C_CONTIGUOUS"] and is_mapped(matrix):
+            yield matrix
+            return
+        del matrix
+    shared = write_shared(os.path.join(cache_dir, SHARED_DIR), features)
+    if shared is None:
+        yield features
+        return
+    try:
+        yield load_shared(shared)
+    finally:
+        remove_shared(shared["path"])
+
+
+class TransformerCache:
+    def __init__(self, cache_dir: str, bytes_limit: int) -> None:
+        self.location = os.path.join(cache_dir, TRANSFORMERS_DIR)
+        self.bytes_limit = bytes_limit
+        self.hits_file = ""
+        self.memory = Memory(self.location, verbose=0)
+
+    def cache(self, func: Callable[..., Any], **options: Any) -> Callable[..., Any]:
+        cached = self.memory.cache(func, **options)
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            hit = cached.check_call_in_cache(*args, **kwargs)
+            with open(self.hits_file, "a", encoding="utf-8") as f:
+                f.write("1\n" if hit else "0\n")
+            return cached(*args, **kwargs)
+
+        return call
+
+    def start(self) -> None:
+        os.makedirs(self.location, exist_ok=True)
+        self.reduce_size()
+        # one file per search: a background job may run next to a foreground one
+        descriptor, self.hits_file = tempfile.mkstemp(
+            prefix=f"{HITS_FILE}.", dir=self.location
+        )
+        os.close(descriptor)
+
+    def finish(self) -> tuple[int, int]:
+        try:
+            with open(self.hits_file, encoding="utf-8") as f:
+                calls = f.read().split()
+            os.remove(self.hits_file)
+        except OSError:
+            calls = []
+        self.reduce_size()
+        return calls.count("1"), len(calls)
+
+    def reduce_size(self) -> None:
+        try:
+            self.memory.reduce_size(bytes_limit=self.bytes_limit)
+        except TypeError:
+            Memory(self.location, bytes_limit=self.bytes_limit, verbose=0).reduce_size()
+
+
+def transformers_size(cache_dir: str) -> int:
+    location = os.path.join(cache_dir, TRANSFORMERS_DIR)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(location)
+        for name in names
+    )
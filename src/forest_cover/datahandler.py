@@ -1,24 +1,315 @@
+import hashlib
+import os
+import shutil
+import time
+from contextlib import ExitStack
+from typing import Any, Callable, Union
+
+import numpy as np
 import pandas as pd
-from .pathhandler import make_abs_path
+from .pathhandler import make_abs_path, check_file_exists
+from .cachehandler import (
+    read_cached,
+    write_cached,
+    open_entry,
+    close_entry,
+    source_meta,
+    stored_fingerprint,
+    set_fingerprint,
+    matrix_file,
+    matrix_blocks,
+    FINGERPRINT,
+    MATRIX_TARGET_FILE,
+)
+
+FLAG_COLUMNS = [f"Wilderness_Area{i}" for i in range(1, 5)] + [
+    f"Soil_Type{i}" for i in range(1, 41)
+]
+NUMERIC_COLUMNS = [
+    "Elevation",
+    "Aspect",
+    "Slope",
+    "Horizontal_Distance_To_Hydrology",
+    "Vertical_Distance_To_Hydrology",
+    "Horizontal_Distance_To_Roadways",
+    "Hillshade_9am",
+    "Hillshade_Noon",
+    "Hillshade_3pm",
+    "Horizontal_Distance_To_Fire_Points",
+]
+SCHEMA_COLUMNS = ["Id", *NUMERIC_COLUMNS, *FLAG_COLUMNS]
+COMPACT_INTEGERS: list[Any] = [np.int16, np.int32]
+NUMERIC_KINDS = set("biuf")
+SAMPLE_ROWS = 1000
+PARSE_OVERHEAD = 3
+FINGERPRINT_CHUNK_ROWS = 65536
+
+
+def compact_integer(column: pd.Series) -> pd.Series:
+    if column.empty:
+        return column
+    low, high = column.min(), column.max()
+    if low >= 0 and high <= 1:
+        return column.astype(np.uint8)
+    for dtype in COMPACT_INTEGERS:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return column.astype(dtype)
+    return column
+
+
+def compact_dtypes(features: pd.DataFrame) -> pd.DataFrame:
+    for name in features.columns:
+        column = features[name]
+        if pd.api.types.is_bool_dtype(column):
+            features[name] = column.astype(np.uint8)
+        elif pd.api.types.is_integer_dtype(column):
+            features[name] = compact_integer(column)
+        elif pd.api.types.is_float_dtype(column):
+            features[name] = column.astype(np.float32)
+    return features
+
+
+def widen_dtypes(features: pd.DataFrame) -> pd.DataFrame:
+    return features.astype(
+        {
+            name: np.int64
+            for name, dtype in features.dtypes.items()
+            if pd.api.types.is_integer_dtype(dtype) and dtype != np.int64
+        }
+    )
+
+
+class Fingerprint:
+    def __init__(self) -> None:
+        self.digest = hashlib.sha1()
 
+    def update(self, chunk: pd.DataFrame) -> None:
+        # row hashes include the index, so chunks must keep their row positions
+        self.digest.update(pd.util.hash_pandas_object(widen_dtypes(chunk)).values)
 
-def load_data(csv_path: str, target_column: str) -> tuple[pd.DataFrame, pd.Series]:
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()
+
+
+def dataset_fingerprint(features: pd.DataFrame) -> str:
+    stored = stored_fingerprint(features)
+    if stored is not None:
+        return stored
+    fingerprint = Fingerprint()
+    for start in range(0, len(features), FINGERPRINT_CHUNK_ROWS):
+        stop = start + FINGERPRINT_CHUNK_ROWS
+        fingerprint.update(features.iloc[start:stop])
+    set_fingerprint(features, fingerprint.hexdigest())
+    return fingerprint.hexdigest()
+
+
+def matches_schema(features: pd.DataFrame) -> bool:
+    if set(features.columns) != set(SCHEMA_COLUMNS):
+        return False
+    if not {np.dtype(dtype).kind for dtype in features.dtypes} <= NUMERIC_KINDS:
+        return False
+    flags = features[FLAG_COLUMNS]
+    return bool(flags.min().min() >= 0 and flags.max().max() <= 1)
+
+
+def missing_column_error(target_column: str) -> KeyError:
+    return KeyError(
+        f"В датасете отсутсвует столбец {target_column}. "
+        f"Укажите название столбца с независимой "
+        f"переменной командой 'targetcolumn'"
+    )
+
+
+def stream_dtypes(sample: pd.DataFrame, compact: bool) -> list[Any]:
+    dtypes = [np.dtype(dtype) for dtype in sample.dtypes]
+    if not {dtype.kind for dtype in dtypes} <= NUMERIC_KINDS:
+        raise ValueError(
+            "Потоковая загрузка поддерживает только датасеты с числовыми "
+            "столбцами. Отключите ее командой 'memlimit 0'"
+        )
+    if not compact:
+        return [np.result_type(*dtypes)] * len(dtypes)
+    # binary flags keep one byte, the rest is stored in 4-byte blocks
+    return [
+        (
+            np.dtype(np.uint8)
+            if dtype.kind == "b" or dtype == np.uint8
+            else np.dtype(np.int32 if dtype.kind in "iu" else np.float32)
+        )
+        for dtype in dtypes
+    ]
+
+
+def cast_chunk(values: Any, dtype: Any) -> Any:
+    if values.dtype.kind not in NUMERIC_KINDS or (
+        dtype.kind in "iu" and values.dtype.kind == "f"
+    ):
+        raise ValueError(
+            f"Не удалось привести часть датасета к типу {dtype}: тип данных "
+            f"столбцов меняется по ходу файла. Увеличьте лимит памяти "
+            f"командой 'memlimit' или отключите потоковую загрузку"
+        )
+    if dtype.kind in "iu" and values.size:
+        info = np.iinfo(dtype)
+        if values.min() < info.min or values.max() > info.max:
+            raise ValueError(
+                f"Значения в датасете выходят за пределы типа {dtype}. "
+                f"Отключите компактный режим командой 'dtypes default'"
+            )
+    return np.ascontiguousarray(values, dtype=dtype)
+
+
+def stream_data(
+    csv_path: str,
+    target_column: str,
+    cache_dir: str,
+    variant: str,
+    memory_limit: int,
+    progress: Union[Callable[[str], None], None] = None,
+) -> None:
+    header = pd.read_csv(csv_path, nrows=0).columns
+    if target_column not in header:
+        raise missing_column_error(target_column)
+    dtype = None
+    if variant == "compact":
+        dtype = {name: np.uint8 for name in FLAG_COLUMNS if name in header}
+    sample = pd.read_csv(csv_path, nrows=SAMPLE_ROWS, dtype=dtype)
+    row_bytes = int(sample.memory_usage(index=False, deep=True).sum()) // max(
+        len(sample), 1
+    )
+    chunksize = max(SAMPLE_ROWS, memory_limit // (max(row_bytes, 1) * PARSE_OVERHEAD))
+    target_dtype = stream_dtypes(sample[[target_column]], False)[0]
+    dtypes = [
+        dtype.str
+        for dtype in stream_dtypes(
+            sample.drop(columns=target_column), variant == "compact"
+        )
+    ]
+    blocks = matrix_blocks(dtypes)
+
+    entry, staging = open_entry(cache_dir, csv_path, target_column, variant)
+    try:
+        rows = 0
+        fingerprint = Fingerprint()
+        started = time.perf_counter()
+        with ExitStack() as files:
+            features_files = {
+                dtype: files.enter_context(
+                    open(os.path.join(staging, matrix_file(dtype)), "wb")
+                )
+                for dtype in blocks
+            }
+            target_file = files.enter_context(
+                open(os.path.join(staging, MATRIX_TARGET_FILE), "wb")
+            )
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=dtype):
+                target = chunk.pop(target_column).to_numpy()
+                target_file.write(cast_chunk(target, target_dtype).tobytes())
+                columns = {}
+                for block_dtype, positions in blocks.items():
+                    values = cast_chunk(
+                        chunk.iloc[:, positions].to_numpy(), np.dtype(block_dtype)
+                    )
+                    features_files[block_dtype].write(values.tobytes())
+                    columns.update(
+                        {position: values[:, i] for i, position in enumerate(positions)}
+                    )
+                fingerprint.update(
+                    pd.DataFrame(
+                        {i: columns[i] for i in range(len(dtypes))}, index=chunk.index
+                    )
+                )
+                rows += len(chunk)
+                if progress is not None:
+                    elapsed = max(time.perf_counter() - started, 1e-9)
+                    progress(f"Загружено строк: {rows} ({int(rows / elapsed)} строк/с)")
+        close_entry(
+            entry,
+            staging,
+            {
+                **source_meta(csv_path, target_column, variant),
+                FINGERPRINT: fingerprint.hexdigest(),
+                "layout": "matrix",
+                "columns": [str(c) for c in header if c != target_column],
+                "dtypes": dtypes,
+                "target_dtype": target_dtype.str,
+                "categories": {},
+                "rows": rows,
+            },
+        )
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_data(
+    csv_path: str,
+    target_column: str,
+    cache_dir: Union[str, None] = None,
+    compact: bool = False,
+    memory_limit: int = 0,
+    progress: Union[Callable[[str], None], None] = None,
+) -> tuple[pd.DataFrame, pd.Series]:
+    csv_path = make_abs_path(csv_path)
+    variant = "compact" if compact else "default"
+    if cache_dir is not None and check_file_exists(csv_path):
+        cache_dir = make_abs_path(cache_dir)
+        cached = read_cached(cache_dir, csv_path, target_column, variant)
+        if cached is None and memory_limit > 0:
+            stream_data(
+                csv_path, target_column, cache_dir, variant, memory_limit, progress
+            )
+            cached = read_cached(cache_dir, csv_path, target_column, variant)
+        if cached is not None:
+            return cached
     try:
-        dataset = pd.read_csv(make_abs_path(csv_path))
+        if compact:
+            header = pd.read_csv(csv_path, nrows=0).columns
+            dataset = pd.read_csv(
+                csv_path,
+                dtype={name: np.uint8 for name in FLAG_COLUMNS if name in header},
+            )
+        else:
+            dataset = pd.read_csv(csv_path)
     except FileNotFoundError:
         raise FileNotFoundError(
             f"Не удалось загрузить файл с датасетом по "
-            f"указанному пути({make_abs_path(csv_path)}). "
+            f"указанному пути({csv_path}). "
             f"Обновите путь командой 'setpath load'"
         )
     try:
-        features = dataset.drop(target_column, axis=1)
-        target = dataset[target_column]
-    except ValueError:
-        raise ValueError(
-            f"В датасете отсутсвует столбец {target_column}. "
-            f"Укажите название столбца с независимой "
-            f"переменной командой 'targetcolumn'"
-        )
+        target = dataset.pop(target_column)
+        features = dataset
+    except KeyError:
+        raise missing_column_error(target_column)
+    if compact:
+        features = compact_dtypes(features)
+        target = target.astype("category")
+    if cache_dir is not None:
+        try:
+            write_cached(
+                cache_dir,
+                csv_path,
+                target_column,
+                variant,
+                features,
+                target,
+                dataset_fingerprint(features),
+            )
+        except OSError:
+            pass
 
     return features, target
+
+
+def load_configured_data(
+    config: dict[str, Any], progress: Union[Callable[[str], None], None] = None
+) -> tuple[pd.DataFrame, pd.Series]:
+    return load_data(
+        config["loadpath"],
+        config["targetcolumn"],
+        config["cachedir"],
+        config["dtypes"] == "compact",
+        config["memlimit"] * 2**20,
+        progress,
+    )
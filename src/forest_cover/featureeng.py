@@ -1,34 +1,283 @@
+import json
+from itertools import combinations
+from typing import Any, Callable, Union
+
 import featuretools as ft
+import numpy as np
 import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from .datahandler import widen_dtypes, compact_dtypes
+from .pathhandler import make_abs_path
+from .cachehandler import (
+    features_key,
+    read_cached_features,
+    write_cached_features,
+    set_fingerprint,
+)
+
+PRIMITIVES = [
+    "multiply_numeric_boolean",
+    "percentile",
+    "modulo_numeric_scalar",
+    "add_numeric",
+    "subtract_numeric",
+]
+CORRELATION_THRESHOLD = 0.96
+CORRELATION_MEMORY = 256 * 2**20
+BYTES_PER_CELL = 24
+IGNORED_COLUMNS = [f"Soil_Type{i}" for i in range(1, 41)]
+FAST_ENGINE_VERSION = 1
+ENGINES = ["auto", "fast"]
+
+
+def feature_specs(columns: list[str]) -> list[tuple[str, str, int, int]]:
+    position = {name: i for i, name in enumerate(columns)}
+    ordered = sorted(columns)
+    pairs = [(position[a], position[b]) for a, b in combinations(ordered, 2)]
+    return (
+        [(name, "base", position[name], 0) for name in columns]
+        + [(f"{columns[a]} + {columns[b]}", "add", a, b) for a, b in pairs]
+        + [(f"{name} % 1", "modulo", position[name], 0) for name in ordered]
+        + [(f"PERCENTILE({name})", "percentile", position[name], 0) for name in ordered]
+        + [(f"{columns[a]} - {columns[b]}", "subtract", a, b) for a, b in pairs]
+    )
+
+
+def feature_block(base: Any, ranks: Any, specs: list[tuple[str, str, int, int]]) -> Any:
+    block = np.empty((base.shape[0], len(specs)))
+    operations = np.array([spec[1] for spec in specs])
+    first = np.array([spec[2] for spec in specs], dtype=np.intp)
+    second = np.array([spec[3] for spec in specs], dtype=np.intp)
+    for operation in np.unique(operations):
+        where = operations == operation
+        left = base[:, first[where]]
+        if operation == "add":
+            block[:, where] = left + base[:, second[where]]
+        elif operation == "subtract":
+            block[:, where] = left - base[:, second[where]]
+        elif operation == "modulo":
+            block[:, where] = np.mod(left, 1)
+        elif operation == "percentile":
+            block[:, where] = ranks[:, first[where]]
+        else:
+            block[:, where] = left
+    return block
+
+
+def standardize(block: Any) -> Any:
+    centered = block - block.mean(axis=0)
+    scale = np.sqrt((centered**2).mean(axis=0))
+    constant = scale == 0
+    scale[constant] = 1
+    standardized = (centered / scale).astype(np.float32)
+    standardized[:, constant] = 0
+    return standardized
+
+
+def correlated_columns(
+    read_block: Callable[[int, int], Any],
+    count: int,
+    rows: int,
+    threshold: float,
+    memory_limit: int,
+) -> set[int]:
+    block_size = max(1, memory_limit // max(rows * BYTES_PER_CELL, 1))
+    dropped: set[int] = set()
+    for start in range(0, count, block_size):
+        stop = min(start + block_size, count)
+        block = standardize(read_block(start, stop))
+        pending = np.ones(stop - start, dtype=bool)
+        for other in range(0, stop, block_size):
+            other_stop = min(other + block_size, stop)
+            if other == start:
+                other_block = block
+            else:
+                other_block = standardize(read_block(other, other_stop))
+            candidates = np.flatnonzero(pending)
+            correlation = np.abs(block[:, candidates].T @ other_block) / rows
+            earlier = (
+                np.arange(other, other_stop)[None, :] < (start + candidates)[:, None]
+            )
+            correlation[~earlier] = 0
+            pending[candidates[correlation.max(axis=1) >= threshold]] = False
+            if not pending.any():
+                break
+        dropped.update(start + int(i) for i in np.flatnonzero(~pending))
+    return dropped
+
+
+def make_fast_features(
+    df: pd.DataFrame, threshold: float, memory_limit: int
+) -> tuple[pd.DataFrame, list[str]]:
+    columns = [name for name in df.columns if name not in IGNORED_COLUMNS]
+    widened = widen_dtypes(df[columns])
+    base = widened.to_numpy(dtype=np.float64)
+    ranks = widened.rank(pct=True).to_numpy(dtype=np.float64)
+    specs = feature_specs(columns)
+    dropped = correlated_columns(
+        lambda start, stop: feature_block(base, ranks, specs[start:stop]),
+        len(specs),
+        len(base),
+        threshold,
+        memory_limit,
+    )
+    kept = [spec for i, spec in enumerate(specs) if i not in dropped]
+    kept_base = [spec[0] for spec in kept if spec[1] == "base"]
+    kept_new = [spec for spec in kept if spec[1] != "base"]
+    new_dataframe = pd.concat(
+        [
+            widened[kept_base].reset_index(drop=True),
+            pd.DataFrame(
+                feature_block(base, ranks, kept_new),
+                columns=[spec[0] for spec in kept_new],
+            ),
+            df[IGNORED_COLUMNS].reset_index(drop=True),
+        ],
+        axis=1,
+    )
+    return new_dataframe, [spec[0] for spec in kept]
 
 
-def make_new_features(df: pd.DataFrame) -> pd.DataFrame:
+class FeatureEngineer(BaseEstimator, TransformerMixin):  # type: ignore
+    def __init__(self, columns: list[str]) -> None:
+        self.columns = columns
 
+    def fit(self, X: pd.DataFrame, y: Any = None) -> "FeatureEngineer":
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.base_ = [name for name in X.columns if name not in IGNORED_COLUMNS]
+        names = set(self.columns)
+        self.specs_ = [spec for spec in feature_specs(self.base_) if spec[0] in names]
+        base = widen_dtypes(X[self.base_]).to_numpy(dtype=np.float64)
+        self.references_ = {
+            spec[2]: np.sort(base[:, spec[2]])
+            for spec in self.specs_
+            if spec[1] == "percentile"
+        }
+        return self
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        base = widen_dtypes(X[self.base_]).to_numpy(dtype=np.float64)
+        ranks = np.zeros_like(base)
+        for i, reference in self.references_.items():
+            left = np.searchsorted(reference, base[:, i], side="left")
+            right = np.searchsorted(reference, base[:, i], side="right")
+            ranks[:, i] = (left + right + 1) / (2 * len(reference))
+        features = pd.DataFrame(
+            feature_block(base, ranks, self.specs_),
+            columns=[spec[0] for spec in self.specs_],
+        )
+        ignored = [name for name in self.columns if name in IGNORED_COLUMNS]
+        features = pd.concat([features, X[ignored].reset_index(drop=True)], axis=1)
+        return features[self.columns]
+
+
+def make_new_features(
+    df: pd.DataFrame,
+    cache_dir: Union[str, None] = None,
+    data_hash: Union[str, None] = None,
+    engine: str = "auto",
+    threshold: float = CORRELATION_THRESHOLD,
+    memory_limit: int = CORRELATION_MEMORY,
+) -> pd.DataFrame:
+    key = None
+    if engine == "fast":
+        settings: dict[str, Any] = {
+            "engine": "fast",
+            "engine_version": FAST_ENGINE_VERSION,
+        }
+    else:
+        settings = {"engine": "featuretools", "engine_version": ft.__version__}
+    settings |= {"primitives": PRIMITIVES, "threshold": threshold}
+    if data_hash is not None:
+        key = features_key(data_hash, *settings.values())
+    if cache_dir is not None and key is not None:
+        cache_dir = make_abs_path(cache_dir)
+        cached = read_cached_features(cache_dir, key)
+        if cached is not None:
+            return cached
+
+    if engine == "fast":
+        new_dataframe, names = make_fast_features(df, threshold, memory_limit)
+        definitions = json.dumps(names, ensure_ascii=False)
+    else:
+        new_dataframe, definitions = make_featuretools_features(
+            df, threshold, memory_limit
+        )
+
+    if cache_dir is not None and key is not None:
+        try:
+            write_cached_features(
+                cache_dir,
+                key,
+                new_dataframe,
+                definitions,
+                {"dataset": data_hash, **settings},
+            )
+        except OSError:
+            pass
+
+    # derived features are identified by the source fingerprint and settings
+    set_fingerprint(new_dataframe, key)
+    return new_dataframe
+
+
+def make_configured_features(
+    config: dict[str, Any], df: pd.DataFrame, data_hash: str, engine: str
+) -> pd.DataFrame:
+    features = make_new_features(
+        df,
+        config["cachedir"],
+        data_hash,
+        engine,
+        config["corrthreshold"],
+        config["corrmemory"] * 2**20,
+    )
+    if config["dtypes"] == "compact":
+        features = compact_dtypes(features)
+    return features
+
+
+def make_featuretools_features(
+    df: pd.DataFrame, threshold: float, memory_limit: int
+) -> tuple[pd.DataFrame, str]:
     es = ft.EntitySet()
     es.add_dataframe(
-        dataframe_name="data", dataframe=df, make_index=True, index="index"
+        dataframe_name="data",
+        dataframe=widen_dtypes(df),
+        make_index=True,
+        index="index",
     )
 
-    col_ignore = []
-    for i in range(1, 41):
-        col_ignore.append("Soil_Type" + str(i))
     feature_m, feature_d = ft.dfs(
         entityset=es,
         target_dataframe_name="data",
-        trans_primitives=[
-            "multiply_numeric_boolean",
-            "percentile",
-            "modulo_numeric_scalar",
-            "add_numeric",
-            "subtract_numeric",
-        ],
-        ignore_columns={"data": col_ignore},
+        trans_primitives=PRIMITIVES,
+        ignore_columns={"data": IGNORED_COLUMNS},
         max_depth=1,
     )
-    new_dataframe, new_features = ft.selection.remove_highly_correlated_features(
-        feature_m, features=feature_d, pct_corr_threshold=0.96
+    numeric = [
+        name
+        for name, dtype in feature_m.dtypes.items()
+        if pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)
+    ]
+    dropped = correlated_columns(
+        lambda start, stop: feature_m[numeric[start:stop]].to_numpy(
+            dtype=np.float64, na_value=np.nan
+        ),
+        len(numeric),
+        len(feature_m),
+        threshold,
+        memory_limit,
+    )
+    dropped_names = {numeric[i] for i in dropped}
+    new_dataframe = feature_m[
+        [name for name in feature_m.columns if name not in dropped_names]
+    ]
+    new_features = [
+        feature for feature in feature_d if feature.get_name() not in dropped_names
+    ]
+    new_dataframe = pd.concat(
+        [new_dataframe, df[IGNORED_COLUMNS].set_axis(new_dataframe.index)], axis=1
     )
-    for col in col_ignore:
-        new_dataframe[col] = df[col]
 
-    return new_dataframe
+    return new_dataframe, ft.save_features(new_features)
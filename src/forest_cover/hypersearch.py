@@ -1,13 +1,35 @@
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
 from sklearn.model_selection import cross_validate
 from sklearn.model_selection import KFold
 from sklearn.model_selection import GridSearchCV
+from sklearn.model_selection import RandomizedSearchCV
+from sklearn.model_selection import HalvingRandomSearchCV
+from sklearn.model_selection import ParameterGrid
+from sklearn.pipeline import Pipeline
+from sklearn.base import clone
+from scipy.stats import loguniform, randint, uniform
 
+import re
+import numpy as np
 import pandas as pd
-from typing import Any
-from .models import set_model, NOT_SO_DEFAULT_PARAMETERS
+from ast import literal_eval
+from typing import Any, Union
+from .models import create_model
 from .train import SCORING
 from .pipeline import create_pipeline
+from .pathhandler import make_abs_path
+from .cachehandler import TransformerCache, shared_matrix
+from .scheduler import cpu_budget, split_budget, set_estimator_threads, limit_threads
+from .scheduler import limit_worker_threads
+from .jobs import Progress, progress_scoring
+from .profiling import StepTimer, profile_scoring, add_profile
 
+INNER_FOLDS = 4
+OUTER_FOLDS = 8
+DEFAULT_BUDGET = 30
+HALVING_FACTOR = 3
+HALVING_MIN_ESTIMATORS = 10
+HALVING_MAX_ESTIMATORS = 300
 
 DEFAULT_SEARCH_GRID: dict[str, Any] = {
     "logit": {"clf__C": [0.1, 1, 10]},
@@ -19,39 +41,277 @@ DEFAULT_SEARCH_GRID: dict[str, Any] = {
     "knn": {"clf__n_neighbors": [5, 10, 20], "clf__leaf_size": [10, 50]},
 }
 
+DEFAULT_SEARCH_DISTRIBUTIONS: dict[str, Any] = {
+    "logit": {"clf__C": loguniform(1e-3, 1e2)},
+    "tree": {
+        "clf__max_depth": randint(3, 50),
+        "clf__min_samples_leaf": randint(1, 60),
+    },
+    "forest": {
+        "clf__n_estimators": randint(50, HALVING_MAX_ESTIMATORS),
+        "clf__max_depth": randint(3, 60),
+    },
+    "knn": {"clf__n_neighbors": randint(1, 40), "clf__leaf_size": randint(5, 60)},
+}
+
+DISTRIBUTIONS = {
+    "uniform": lambda low, high: uniform(low, high - low),
+    "loguniform": loguniform,
+    "randint": randint,
+}
+
 
 def hypersearch(
     config: dict[str, Any],
     data: tuple[pd.DataFrame, pd.Series],
     parameters: dict[str, Any],
-) -> tuple[dict[str, Any], dict[str, Any]]:
-    cv_inner = KFold(n_splits=4, shuffle=True, random_state=config["randomstate"])
-    cv_outer = KFold(n_splits=8, shuffle=True, random_state=config["randomstate"])
-    model = set_model(config["model"], NOT_SO_DEFAULT_PARAMETERS[config["model"]])
-    if not parameters:
-        parameters = DEFAULT_SEARCH_GRID[config["model"]]
+    strategy: str = "grid",
+    budget: Union[int, None] = None,
+    progress: Union[Progress, None] = None,
+) -> tuple[dict[str, Any], dict[str, Any], Pipeline, int, Union[tuple[int, int], None]]:
+    cv_inner = KFold(
+        n_splits=INNER_FOLDS, shuffle=True, random_state=config["randomstate"]
+    )
+    cv_outer = KFold(
+        n_splits=OUTER_FOLDS, shuffle=True, random_state=config["randomstate"]
+    )
+    model = create_model(config["model"])
+    parameters = search_parameters(config["model"], parameters, strategy)
+    memory = None
+    if config["pipecache"] > 0 and (config["scaler"], config["dimreduct"]) != (
+        "none",
+        "none",
+    ):
+        memory = TransformerCache(
+            make_abs_path(config["cachedir"]), config["pipecache"] * 2**20
+        )
+        memory.start()
+    timer = StepTimer(memory)
     pipeline = create_pipeline(
-        scaler=config["scaler"], dimreduct=config["dimreduct"], model=model
+        scaler=config["scaler"],
+        dimreduct=config["dimreduct"],
+        model=model,
+        memory=timer,
+    )
+    cores = cpu_budget(config)
+    outer, inner, threads = split_budget(
+        cores,
+        OUTER_FOLDS,
+        count_candidates(parameters, strategy, budget) * INNER_FOLDS,
     )
-    clf = GridSearchCV(
-        pipeline, parameters, scoring="accuracy", n_jobs=-1, cv=cv_inner, refit=True
+    pipeline = set_estimator_threads(pipeline, threads)
+    scoring: Any = SCORING
+    inner_scoring: Any = "accuracy"
+    if progress is not None:
+        scoring = progress_scoring(SCORING, progress, "fold")
+        inner_scoring = progress_scoring("accuracy", progress, "candidate")
+    clf = create_search(
+        pipeline, parameters, cv_inner, config, strategy, budget, inner, inner_scoring
     )
-    scores = cross_validate(
-        clf, data[0], data[1], cv=cv_outer, scoring=SCORING, n_jobs=-1
+    try:
+        with limit_threads(threads), limit_worker_threads(
+            max(outer, inner), threads
+        ), shared_matrix(make_abs_path(config["cachedir"]), data[0]) as matrix:
+            scores = cross_validate(
+                clf,
+                matrix,
+                data[1],
+                cv=cv_outer,
+                scoring=profile_scoring(scoring),
+                n_jobs=outer,
+                return_estimator=True,
+            )
+        searches = scores.pop("estimator")
+        add_profile(
+            scores,
+            timer,
+            model,
+            sum(count_fits(search) for search in searches),
+            sum(candidates_time(search, "fit") for search in searches),
+            sum(count_fits(search) - 1 for search in searches),
+            sum(candidates_time(search, "score") for search in searches),
+        )
+    finally:
+        timer.remove()
+    cache_hits = memory.finish() if memory is not None else None
+    best_params = best_candidate(searches)
+    final_pipeline = set_estimator_threads(
+        clone(pipeline).set_params(memory=None, **best_params), cores
+    )
+    with limit_threads(cores):
+        final_pipeline.fit(data[0], data[1])
+    fits = sum(count_fits(search) for search in searches) + 1
+
+    return best_params, scores, final_pipeline, fits, cache_hits
+
+
+def create_search(
+    pipeline: Pipeline,
+    parameters: dict[str, Any],
+    cv: KFold,
+    config: dict[str, Any],
+    strategy: str,
+    budget: Union[int, None],
+    n_jobs: int = -1,
+    scoring: Any = "accuracy",
+) -> Any:
+    if strategy == "grid":
+        return GridSearchCV(
+            pipeline, parameters, scoring=scoring, n_jobs=n_jobs, cv=cv, refit=True
+        )
+    if budget is None:
+        budget = DEFAULT_BUDGET
+    if strategy == "random":
+        return RandomizedSearchCV(
+            pipeline,
+            parameters,
+            n_iter=budget,
+            scoring=scoring,
+            n_jobs=n_jobs,
+            cv=cv,
+            refit=True,
+            random_state=config["randomstate"],
+        )
+    parameters, resource = halving_resource(config["model"], parameters, budget)
+    return HalvingRandomSearchCV(
+        pipeline,
+        parameters,
+        n_candidates=budget,
+        factor=HALVING_FACTOR,
+        scoring=scoring,
+        n_jobs=n_jobs,
+        cv=cv,
+        refit=True,
+        random_state=config["randomstate"],
+        **resource,
     )
 
-    search_final = GridSearchCV(
-        pipeline, parameters, scoring="accuracy", n_jobs=-1, cv=cv_inner, refit=True
+
+def halving_resource(
+    model: str, parameters: dict[str, Any], budget: Union[int, None]
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    if model != "forest":
+        return parameters, {"resource": "n_samples"}
+    # a forest grows its trees as the resource instead of taking more rows
+    parameters = dict(parameters)
+    estimators = parameters.pop("clf__n_estimators", None)
+    if not parameters:
+        raise ValueError(
+            "При стратегии halving n_estimators служит ресурсом (число деревьев "
+            "растет от итерации к итерации), поэтому в сетке должен быть хотя бы "
+            "еще один параметр случайного леса"
+        )
+    if isinstance(estimators, list):
+        max_resources = max(estimators)
+    elif estimators is not None and hasattr(estimators, "support"):
+        max_resources = int(estimators.support()[1])
+    else:
+        max_resources = HALVING_MAX_ESTIMATORS
+    candidates = count_candidates(parameters, "halving", budget)
+    rounds = 0
+    while HALVING_FACTOR ** (rounds + 1) <= candidates:
+        rounds += 1
+    return parameters, {
+        "resource": "clf__n_estimators",
+        "min_resources": max(
+            HALVING_MIN_ESTIMATORS, max_resources // HALVING_FACTOR**rounds
+        ),
+        "max_resources": max_resources,
+    }
+
+
+def search_parameters(
+    model: str, parameters: dict[str, Any], strategy: str
+) -> dict[str, Any]:
+    if parameters:
+        return parameters
+    if strategy == "grid":
+        return dict(DEFAULT_SEARCH_GRID[model])
+    return dict(DEFAULT_SEARCH_DISTRIBUTIONS[model])
+
+
+def progress_totals(
+    model: str, parameters: dict[str, Any], strategy: str, budget: Union[int, None]
+) -> dict[str, int]:
+    totals = {"fold": OUTER_FOLDS}
+    if strategy != "halving":
+        candidates = count_candidates(
+            search_parameters(model, parameters, strategy), strategy, budget
+        )
+        totals["candidate"] = candidates * INNER_FOLDS * OUTER_FOLDS
+    return totals
+
+
+def count_candidates(
+    parameters: dict[str, Any], strategy: str, budget: Union[int, None]
+) -> int:
+    if all(isinstance(value, list) for value in parameters.values()):
+        grid_size = len(ParameterGrid(parameters))
+        if strategy == "grid":
+            return grid_size
+        return min(budget or DEFAULT_BUDGET, grid_size)
+    return budget or DEFAULT_BUDGET
+
+
+def best_candidate(searches: list[Any]) -> dict[str, Any]:
+    candidates: dict[str, dict[str, Any]] = {}
+    results: dict[str, list[float]] = {}
+    for search in searches:
+        cv_results = search.cv_results_
+        last_iteration = np.ones(len(cv_results["params"]), dtype=bool)
+        if "iter" in cv_results:
+            last_iteration = cv_results["iter"] == np.max(cv_results["iter"])
+        for params, score, last in zip(
+            cv_results["params"], cv_results["mean_test_score"], last_iteration
+        ):
+            if last:
+                key = repr(sorted(params.items()))
+                candidates[key] = params
+                results.setdefault(key, []).append(float(score))
+    best = max(
+        results,
+        key=lambda key: (
+            len(results[key]),
+            np.nan_to_num(np.nanmean(results[key]), nan=-np.inf),
+        ),
     )
+    return candidates[best]
+
+
+def count_fits(search: Any) -> int:
+    candidates = len(search.cv_results_["params"])
+    return int(candidates * search.n_splits_) + int(search.refit is not False)
+
+
+def candidates_time(search: Any, stage: str) -> float:
+    seconds = np.sum(search.cv_results_[f"mean_{stage}_time"]) * search.n_splits_
+    if stage == "fit":
+        seconds += search.refit_time_
+    return float(seconds)
 
-    clf = GridSearchCV(estimator=pipeline, param_grid=parameters, cv=cv_outer)
-    clf.fit(data[0], data[1])
 
-    return search_final.fit(data[0], data[1]).best_params_, scores
+def parse_distributions(parameters: dict[str, Any]) -> dict[str, Any]:
+    parsed = {}
+    for name, value in parameters.items():
+        if isinstance(value, str):
+            match = re.fullmatch(r"(\w+)\((.*)\)", value)
+            try:
+                if match is None:
+                    raise ValueError(value)
+                arguments = literal_eval(f"({match.group(2)},)")
+                value = DISTRIBUTIONS[match.group(1)](*arguments)
+            except (ValueError, SyntaxError, TypeError, KeyError) as e:
+                raise ValueError(
+                    f"Не удалось распознать распределение {value} для параметра "
+                    f"{name}: используйте uniform(a,b), loguniform(a,b) или "
+                    f"randint(a,b)"
+                ) from e
+        parsed[name] = value
+    return parsed
 
 
 def check_params_validity(config: dict[str, Any], parameters: dict[str, Any]) -> None:
-    model = set_model(config["model"], {})
+    model = create_model(config["model"])
     pipeline = create_pipeline(
         scaler=config["scaler"], dimreduct=config["dimreduct"], model=model
     )
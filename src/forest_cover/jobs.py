@@ -0,0 +1,190 @@
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Union
+
+JOB_WORKERS = 1
+CANCEL_SUFFIX = ".cancel"
+STAGES = {
+    "fold": "фолдов",
+    "candidate": "кандидатов в фолдах",
+    "chunk": "порций файла",
+}
+
+
+class JobCancelled(BaseException):
+    pass
+
+
+class Progress:
+    def __init__(self) -> None:
+        handle, self.path = tempfile.mkstemp(prefix="forest_cover_job", suffix=".log")
+        os.close(handle)
+
+    def report(self, stage: str) -> None:
+        if os.path.exists(self.path + CANCEL_SUFFIX):
+            raise JobCancelled("Задача отменена")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"{stage}\n")
+
+    def counts(self) -> Counter[str]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return Counter(f.read().split())
+        except OSError:
+            return Counter()
+
+    def cancel(self) -> None:
+        with open(self.path + CANCEL_SUFFIX, "w", encoding="utf-8"):
+            pass
+
+    def remove(self) -> None:
+        for path in [self.path, self.path + CANCEL_SUFFIX]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class ProgressScorer:
+    def __init__(self, scorer: Any, progress: Progress, stage: str) -> None:
+        self.scorer = scorer
+        self.progress = progress
+        self.stage = stage
+
+    def __call__(self, estimator: Any, features: Any, target: Any) -> Any:
+        score = self.scorer(estimator, features, target)
+        self.progress.report(self.stage)
+        return score
+
+
+def progress_scoring(
+    scoring: Union[str, list[str]], progress: Progress, stage: str
+) -> Any:
+    from sklearn.metrics import get_scorer
+
+    if isinstance(scoring, str):
+        return ProgressScorer(get_scorer(scoring), progress, stage)
+    scorers = {name: get_scorer(name) for name in scoring}
+    # wrap only the last scorer: the others keep sharing cached predictions
+    scorers[scoring[-1]] = ProgressScorer(scorers[scoring[-1]], progress, stage)
+    return scorers
+
+
+class Job:
+    def __init__(self, job_id: int, description: str, totals: dict[str, int]) -> None:
+        self.id = job_id
+        self.description = description
+        self.totals = totals
+        self.messages: list[str] = []
+        self.progress: Union[Progress, None] = None
+        self.counts: Counter[str] = Counter()
+        self.future: Future[Any] = Future()
+        self.started: Union[float, None] = None
+        self.finished: Union[float, None] = None
+
+    def output(self, message: str) -> None:
+        self.messages.append(message)
+
+    def status(self) -> str:
+        if self.future.cancelled():
+            return "отменена"
+        if not self.future.done():
+            return "выполняется" if self.started is not None else "в очереди"
+        if isinstance(self.future.exception(), JobCancelled):
+            return "отменена"
+        if self.future.exception() is not None:
+            return "ошибка"
+        return "завершена"
+
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def stages(self) -> str:
+        counts = self.progress.counts() if self.progress is not None else self.counts
+        return ", ".join(
+            f"{STAGES[stage]}: {counts[stage]}"
+            + (f"/{self.totals[stage]}" if stage in self.totals else "")
+            for stage in STAGES
+            if stage in counts or stage in self.totals
+        )
+
+
+class JobQueue:
+    def __init__(
+        self,
+        notify: Callable[[str], None],
+        workers: int = JOB_WORKERS,
+    ) -> None:
+        self.notify = notify
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="forest_cover_job"
+        )
+        self.jobs: dict[int, Job] = {}
+        self.lock = threading.Lock()
+
+    def submit(
+        self,
+        description: str,
+        func: Callable[[Callable[[str], None], Progress], None],
+        totals: Union[dict[str, int], None] = None,
+    ) -> Job:
+        with self.lock:
+            job = Job(len(self.jobs) + 1, description, totals or {})
+            self.jobs[job.id] = job
+        job.progress = Progress()
+        job.future = self.executor.submit(self.run, job, func)
+        return job
+
+    def run(
+        self, job: Job, func: Callable[[Callable[[str], None], Progress], None]
+    ) -> None:
+        job.started = time.perf_counter()
+        progress = job.progress
+        assert progress is not None
+        outcome = "завершилась с ошибкой"
+        try:
+            func(job.output, progress)
+            outcome = f"выполнена за {round(job.elapsed(), 1)} с"
+        except JobCancelled:
+            outcome = "отменена"
+            raise
+        finally:
+            job.finished = time.perf_counter()
+            job.counts = progress.counts()
+            job.progress = None
+            progress.remove()
+            self.notify(
+                f"Задача {job.id} ({job.description}) {outcome}. "
+                f"Результаты: 'wait {job.id}'"
+            )
+
+    def get(self, job_id: int) -> Job:
+        try:
+            return self.jobs[job_id]
+        except KeyError:
+            raise KeyError(
+                f"Задача {job_id} не найдена. Список задач: команда 'jobs'"
+            ) from None
+
+    def cancel(self, job_id: int) -> bool:
+        job = self.get(job_id)
+        progress = job.progress
+        if progress is None or job.future.done():
+            return False
+        if job.future.cancel():
+            progress.remove()
+            return True
+        progress.cancel()
+        return True
+
+    def shutdown(self) -> None:
+        for job in self.jobs.values():
+            if not job.future.done():
+                self.cancel(job.id)
+        self.executor.shutdown(wait=True)
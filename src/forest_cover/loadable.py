@@ -1,33 +1,206 @@
 import cmd2
 from cmd2 import CommandSet, with_default_category
 import argparse
+import os
 import numpy as np
 from ast import literal_eval
-from typing import Any
+from typing import Any, Callable, Union
 
-from .models import set_model, clean_parameters, MODELS
-from .pipeline import create_pipeline
-from .datahandler import load_data
-from .train import train, SCORING
-from .hypersearch import hypersearch, check_params_validity, append_parameter_profixes
+from .models import create_model, clean_parameters
+from .models import STREAM_CHUNK_ROWS, MIN_CHUNK_ROWS, HOLDOUT, EPOCHS
+from .jobs import Progress
+from .pathhandler import make_abs_path
 
 
-def finilize(app: Any, parameters: dict[str, Any]) -> None:
-    if app.data[0] is None:
-        app.data = load_data(app.config["loadpath"], app.config["targetcolumn"])
-    model = set_model(app.config["model"], parameters)
-    app.poutput(
-        f"Строим модель {app.config['model']} c параметрами "
-        f"{parameters} (scaler: {app.config['scaler']}, "
-        f"feateng: {app.config['feateng']}, dimreduct: "
-        f"{app.config['dimreduct']})..."
+def feature_step(app: Any) -> Any:
+    if app.config["feateng"] == "none":
+        return None
+    from .datahandler import load_configured_data
+    from .featureeng import FeatureEngineer
+
+    raw_features = load_configured_data(app.config)[0]
+    return FeatureEngineer(list(app.data[0].columns)).fit(raw_features)
+
+
+def add_job_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "-b",
+        "--background",
+        action="store_true",
+        help="выполнить в фоне, не блокируя ввод команд (ход выполнения: "
+        "'jobs', результаты: 'wait')",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="записать профиль выполнения (cProfile) в файл .prof рядом с "
+        "файлом модели (см. setpath dump)",
     )
-    pipeline = create_pipeline(app.config["scaler"], app.config["dimreduct"], model)
-    scores = train(pipeline, app.data, parameters, app.config)
+
+
+def run_job(
+    app: Any,
+    description: str,
+    func: Callable[[Callable[[str], None], Union[Progress, None]], None],
+    background: bool,
+    totals: dict[str, int],
+    profile: bool = False,
+) -> None:
+    if profile:
+        from .profiling import profiled
+
+        path = os.path.splitext(make_abs_path(app.config["dumppath"]))[0] + ".prof"
+        func = profiled(func, path)
+    if not background:
+        func(app.poutput, None)
+        return
+    job = app.jobs.submit(description, func, totals)
     app.poutput(
-        f"Успешно! Accuracy (balanced): "
-        f"{round(float(np.mean(scores['test_balanced_accuracy'])), 4)}"
+        f"Задача {job.id} поставлена в очередь. Ход выполнения: 'jobs', "
+        f"результаты: 'wait {job.id}', отмена: 'cancel {job.id}'"
+    )
+
+
+def finilize(
+    app: Any,
+    parameters: dict[str, Any],
+    background: bool = False,
+    profile: bool = False,
+) -> None:
+    from .datahandler import load_configured_data
+    from .pipeline import create_pipeline
+    from .train import train
+    from .profiling import profile_summary
+
+    if app.data[0] is None:
+        app.data = load_configured_data(app.config, app.poutput)
+    config = dict(app.config)
+    data = app.data
+    model = create_model(config["model"], parameters)
+    description = (
+        f"{config['model']} c параметрами "
+        f"{parameters} (scaler: {config['scaler']}, "
+        f"feateng: {config['feateng']}, dimreduct: "
+        f"{config['dimreduct']})"
+    )
+    app.poutput(f"Строим модель {description}...")
+    pipeline = create_pipeline(config["scaler"], config["dimreduct"], model)
+    features = feature_step(app)
+
+    def fit(output: Callable[[str], None], progress: Union[Progress, None]) -> None:
+        scores = train(pipeline, data, parameters, config, features, progress)
+        output(
+            f"Успешно! Accuracy (balanced): "
+            f"{round(float(np.mean(scores['test_balanced_accuracy'])), 4)}"
+        )
+        if "warm_folds" in scores:
+            output(
+                f"Теплый старт: продолжено обучение моделей фолдов: "
+                f"{scores['warm_folds']} из {config['eval']}"
+            )
+        for line in profile_summary(
+            scores, "Время и память по фолдам", "Время по шагам конвейера"
+        ):
+            output(line)
+
+    run_job(
+        app,
+        f"train {description}",
+        fit,
+        background,
+        {"fold": config["eval"]},
+        profile,
+    )
+
+
+def add_stream_arguments(parser: argparse.ArgumentParser, epochs: bool) -> None:
+    parser.add_argument(
+        "-c",
+        "--chunksize",
+        type=int,
+        default=STREAM_CHUNK_ROWS,
+        help=f"число строк CSV-файла, читаемых за один раз "
+        f"[по умолчанию: {STREAM_CHUNK_ROWS}]",
+    )
+    parser.add_argument(
+        "--holdout",
+        type=float,
+        default=HOLDOUT,
+        help=f"доля строк, отложенных для оценки модели [по умолчанию: {HOLDOUT}]",
+    )
+    if epochs:
+        parser.add_argument(
+            "-e",
+            "--epochs",
+            type=int,
+            default=EPOCHS,
+            help=f"число проходов по файлу при обучении [по умолчанию: {EPOCHS}]",
+        )
+
+
+def finilize_stream(
+    app: Any,
+    parameters: dict[str, Any],
+    ns: argparse.Namespace,
+) -> None:
+    from .pipeline import create_streaming_pipeline
+    from .streaming import stream_train
+    from .train import log_run
+    from .profiling import profile_summary
+
+    epochs = getattr(ns, "epochs", 1)
+    if ns.chunksize < MIN_CHUNK_ROWS or epochs < 1 or not 0 < ns.holdout < 1:
+        app.poutput(
+            f"Число строк в порции должно быть не меньше {MIN_CHUNK_ROWS}, "
+            f"число проходов - положительным, доля отложенных строк - в "
+            f"пределах (0, 1)"
+        )
+        return
+    if app.config["feateng"] != "none":
+        app.poutput(
+            "Потоковое обучение использует исходные признаки CSV-файла. "
+            "Отключите feature engineering командой 'feateng none'"
+        )
+        return
+    config = dict(app.config)
+    pipeline = create_streaming_pipeline(
+        config["scaler"], config["dimreduct"], create_model(config["model"], parameters)
     )
+    description = (
+        f"{config['model']} c параметрами {parameters} (scaler: "
+        f"{config['scaler']}, dimreduct: {config['dimreduct']}, "
+        f"потоковое обучение)"
+    )
+    app.poutput(f"Строим модель {description}...")
+    chunksize, holdout = ns.chunksize, ns.holdout
+
+    def fit(output: Callable[[str], None], progress: Union[Progress, None]) -> None:
+        scores = stream_train(
+            pipeline, config, chunksize, holdout, epochs, progress, output
+        )
+        options = {"chunksize": chunksize, "holdout": holdout, "epochs": epochs}
+        log_run(
+            pipeline,
+            scores,
+            {**parameters, **options},
+            config,
+            1,
+            dataset=scores["fingerprint"],
+        )
+        train_rows, holdout_rows = scores["rows"]
+        output(
+            f"Успешно! Обучено на {train_rows} строках, оценено на {holdout_rows} "
+            f"отложенных строках. Accuracy (balanced): "
+            f"{round(float(scores['test_balanced_accuracy'][0]), 4)}, "
+            f"F1 (weighted): {round(float(scores['test_f1_weighted'][0]), 4)}, "
+            f"ROC AUC (ovo): {round(float(scores['test_roc_auc_ovo_weighted'][0]), 4)}"
+        )
+        for line in profile_summary(
+            scores, "Время и память (отложенная выборка)", "Время по шагам конвейера"
+        ):
+            output(line)
+
+    run_job(app, f"train {description}", fit, ns.background, {}, ns.profile)
 
 
 def parse_unknown_args(
@@ -73,9 +246,10 @@ def parse_unknown_args(
     known_parameters = clean_parameters(vars(k_args))
     all_parameters = uknown_parameters | known_parameters
 
+    estimator = create_model(model)
     for key, value in all_parameters.items():
         try:
-            MODELS[model].set_params(**{key: value})
+            estimator.set_params(**{key: value})
         except ValueError as e:
             raise ValueError(
                 f"Не удалось распознать введеный дополнительный " f"параметр {key}"
@@ -111,6 +285,7 @@ class LoadableLogit(CommandSet):  # type: ignore
         help="максимальное число итераций при попытке до"
         "стижения сходимости [по умолчанию: 1000]",
     )
+    add_job_arguments(train_parser)
 
     def __init__(self, ml_app: Any):
         super().__init__()
@@ -127,7 +302,12 @@ class LoadableLogit(CommandSet):  # type: ignore
         elif ns.penalty == "l2":
             unknown.append("--solver")
             unknown.append("lbfgs")
-        finilize(self.app, parse_unknown_args(self.app.config["model"], unknown, ns))
+        finilize(
+            self.app,
+            parse_unknown_args(self.app.config["model"], unknown, ns),
+            ns.background,
+            ns.profile,
+        )
 
 
 @with_default_category("Обучение и оценка (дерево решений)")
@@ -160,6 +340,7 @@ class LoadableTree(CommandSet):  # type: ignore
         choices=["gini", "entropy"],
         help="функция, оценивающая качество разделения",
     )
+    add_job_arguments(train_parser)
 
     def __init__(self, ml_app: Any):
         super().__init__()
@@ -176,7 +357,12 @@ class LoadableTree(CommandSet):  # type: ignore
             ns.max_features = int(ns.max_features)
         except ValueError:
             pass
-        finilize(self.app, parse_unknown_args(self.app.config["model"], unknown, ns))
+        finilize(
+            self.app,
+            parse_unknown_args(self.app.config["model"], unknown, ns),
+            ns.background,
+            ns.profile,
+        )
 
 
 @with_default_category("Обучение и оценка (случайный лес)")
@@ -217,6 +403,7 @@ class LoadableForest(CommandSet):  # type: ignore
         choices=["gini", "entropy"],
         help="функция, оценивающая качество " "разделения [по умолчанию: gini]",
     )
+    add_job_arguments(train_parser)
 
     def __init__(self, ml_app: Any):
         super().__init__()
@@ -233,7 +420,12 @@ class LoadableForest(CommandSet):  # type: ignore
             ns.max_features = int(ns.max_features)
         except ValueError:
             pass
-        finilize(self.app, parse_unknown_args(self.app.config["model"], unknown, ns))
+        finilize(
+            self.app,
+            parse_unknown_args(self.app.config["model"], unknown, ns),
+            ns.background,
+            ns.profile,
+        )
 
 
 @with_default_category("Обучение и оценка (kNN)")
@@ -256,6 +448,78 @@ class LoadablekNN(CommandSet):  # type: ignore
         default="uniform",
         help="функция взвешивания [по умолчанию: " "uniform]",
     )
+    add_job_arguments(train_parser)
+
+    def __init__(self, ml_app: Any):
+        super().__init__()
+        self.app = ml_app
+
+    @cmd2.with_argparser(train_parser, with_unknown_args=True)  # type: ignore
+    def do_train(self, ns: argparse.Namespace, unknown: list[str]) -> None:
+        finilize(
+            self.app,
+            parse_unknown_args(self.app.config["model"], unknown, ns),
+            ns.background,
+            ns.profile,
+        )
+
+
+@with_default_category("Обучение и оценка (SGD, потоковое обучение)")
+class LoadableSGD(CommandSet):  # type: ignore
+
+    train_parser = cmd2.Cmd2ArgumentParser()
+    train_parser.add_argument(
+        "-l",
+        "--loss",
+        type=str,
+        choices=["log_loss", "modified_huber"],
+        default="log_loss",
+        help="функция потерь: логистическая или сглаженная hinge "
+        "[по умолчанию: log_loss]",
+    )
+    train_parser.add_argument(
+        "-p",
+        "--penalty",
+        type=str,
+        choices=["l2", "l1", "elasticnet"],
+        default="l2",
+        help="норма регуляризации [по умолчанию: l2]",
+    )
+    train_parser.add_argument(
+        "-a",
+        "--alpha",
+        type=float,
+        default=0.0001,
+        help="сила регуляризации [по умолчанию: 0.0001]",
+    )
+    add_stream_arguments(train_parser, epochs=True)
+    add_job_arguments(train_parser)
+
+    def __init__(self, ml_app: Any):
+        super().__init__()
+        self.app = ml_app
+
+    @cmd2.with_argparser(train_parser, with_unknown_args=True)  # type: ignore
+    def do_train(self, ns: argparse.Namespace, unknown: list[str]) -> None:
+        finilize_stream(
+            self.app, parse_unknown_args(self.app.config["model"], unknown, ns), ns
+        )
+
+
+@with_default_category("Обучение и оценка (наивный байес, потоковое обучение)")
+class LoadableNB(CommandSet):  # type: ignore
+
+    train_parser = cmd2.Cmd2ArgumentParser()
+    train_parser.add_argument(
+        "-v",
+        "--var_smoothing",
+        type=float,
+        default=1e-9,
+        help="доля наибольшей дисперсии признаков, добавляемая к дисперсиям "
+        "для устойчивости расчетов [по умолчанию: 1e-9]",
+    )
+    add_stream_arguments(train_parser, epochs=False)
+    add_job_arguments(train_parser)
 
     def __init__(self, ml_app: Any):
         super().__init__()
@@ -263,7 +527,9 @@ class LoadablekNN(CommandSet):  # type: ignore
 
     @cmd2.with_argparser(train_parser, with_unknown_args=True)  # type: ignore
     def do_train(self, ns: argparse.Namespace, unknown: list[str]) -> None:
-        finilize(self.app, parse_unknown_args(self.app.config["model"], unknown, ns))
+        finilize_stream(
+            self.app, parse_unknown_args(self.app.config["model"], unknown, ns), ns
+        )
 
 
 class LoadableHyperSearch(CommandSet):  # type: ignore
@@ -279,8 +545,30 @@ class LoadableHyperSearch(CommandSet):  # type: ignore
         "ным фигурными скобками {...} и не содержа"
         "щим пробелов; при отсутствии аргумента "
         "будет передан стандартный набор значений "
-        "для поиска",
+        "для поиска; для стратегий random и halving "
+        "значениями могут быть распределения "
+        'вида "uniform(a,b)", "loguniform(a,b)", '
+        '"randint(a,b)"',
+    )
+    hyper_parser.add_argument(
+        "-s",
+        "--strategy",
+        type=str,
+        choices=["grid", "random", "halving"],
+        default="grid",
+        help="стратегия поиска: полный перебор сетки, случайный "
+        "поиск или последовательное деление пополам "
+        "(successive halving) [по умолчанию: grid]",
     )
+    hyper_parser.add_argument(
+        "-n",
+        "--budget",
+        type=int,
+        default=None,
+        help="число исследуемых кандидатов для стратегий random и "
+        "halving [по умолчанию: 30]",
+    )
+    add_job_arguments(hyper_parser)
 
     def __init__(self, ml_app: Any):
         super().__init__()
@@ -288,10 +576,26 @@ class LoadableHyperSearch(CommandSet):  # type: ignore
 
     @cmd2.with_argparser(hyper_parser)  # type: ignore
     def do_hypersearch(self, ns: argparse.Namespace) -> None:
+        from .datahandler import load_configured_data, dataset_fingerprint
+        from .train import log_run, SCORING
+        from .hypersearch import (
+            hypersearch,
+            check_params_validity,
+            append_parameter_profixes,
+            parse_distributions,
+            progress_totals,
+            search_parameters,
+            halving_resource,
+            OUTER_FOLDS,
+        )
+        from .profiling import profile_summary
+
         if ns.param_grid:
             try:
                 parameters = literal_eval(ns.param_grid)
                 parameters = append_parameter_profixes(parameters)
+                if ns.strategy != "grid":
+                    parameters = parse_distributions(parameters)
                 check_params_validity(self.app.config, parameters)
             except ValueError as e:
                 self.app.poutput(
@@ -303,35 +607,90 @@ class LoadableHyperSearch(CommandSet):  # type: ignore
                 return
         else:
             parameters = ""
+        if ns.budget is not None and ns.budget < 1:
+            self.app.poutput("Число кандидатов должно быть положительным")
+            return
+        if ns.strategy == "halving":
+            try:
+                _, resource = halving_resource(
+                    self.app.config["model"],
+                    search_parameters(self.app.config["model"], parameters, "halving"),
+                    ns.budget,
+                )
+            except ValueError as e:
+                self.app.poutput(str(e))
+                return
+            if resource["resource"] == "clf__n_estimators":
+                self.app.poutput(
+                    f"Ресурс halving - число деревьев (n_estimators): от "
+                    f"{resource['min_resources']} до {resource['max_resources']}"
+                )
         self.app.poutput("Оцениваем алгоритм и гиперпараметры...")
         if self.app.data[0] is None:
-            self.app.data = load_data(
-                self.app.config["loadpath"], self.app.config["targetcolumn"]
+            self.app.data = load_configured_data(self.app.config, self.app.poutput)
+        config = dict(self.app.config)
+        data = self.app.data
+        features = feature_step(self.app)
+        strategy, budget = ns.strategy, ns.budget
+
+        def search(
+            output: Callable[[str], None], progress: Union[Progress, None]
+        ) -> None:
+            params, scores, pipeline, fits, cache_hits = hypersearch(
+                config, data, parameters, strategy, budget, progress
             )
-        params, scores = hypersearch(self.app.config, self.app.data, parameters)
-        accuracy_mean = float(np.mean(scores["test_" + SCORING[0]]))
-        f1_mean = float(np.mean(scores["test_" + SCORING[1]]))
-        roc_auc = float(np.mean(scores["test_" + SCORING[2]]))
-        model = set_model(self.app.config["model"])
-        pipeline = create_pipeline(
-            self.app.config["scaler"], self.app.config["dimreduct"], model
-        )
-        train(pipeline, self.app.data, params, self.app.config, True)
-        self.app.poutput(
-            f"Метрики оцениваемого алгоритма (метод оценки - nested cross-validation): "
-            f"accuracy (balanced): "
-            f"{round(accuracy_mean, 4)}, "
-            f"F1 (weighted): "
-            f"{round(f1_mean, 4)}, "
-            f"ROC AUC (ovo): "
-            f"{round(roc_auc, 4)}. Модель: "
-            f'{self.app.config["model"]}, scaler: '
-            f'{self.app.config["scaler"]}, dimreduct: '
-            f'{self.app.config["dimreduct"]}, feateng: '
-            f'{self.app.config["feateng"]}'
-        )
-        self.app.poutput(
-            f"Лучший набор параметров из исследованных GridSearch: {params}"
+            accuracy_mean = float(np.mean(scores["test_" + SCORING[0]]))
+            f1_mean = float(np.mean(scores["test_" + SCORING[1]]))
+            roc_auc = float(np.mean(scores["test_" + SCORING[2]]))
+            log_run(
+                pipeline,
+                scores,
+                params,
+                config,
+                OUTER_FOLDS,
+                True,
+                features,
+                dataset_fingerprint(data[0]),
+            )
+            output(
+                f"Метрики оцениваемого алгоритма (метод оценки - nested "
+                f"cross-validation): "
+                f"accuracy (balanced): "
+                f"{round(accuracy_mean, 4)}, "
+                f"F1 (weighted): "
+                f"{round(f1_mean, 4)}, "
+                f"ROC AUC (ovo): "
+                f"{round(roc_auc, 4)}. Модель: "
+                f'{config["model"]}, scaler: '
+                f'{config["scaler"]}, dimreduct: '
+                f'{config["dimreduct"]}, feateng: '
+                f'{config["feateng"]}'
+            )
+            output(f"Лучший набор параметров из исследованных ({strategy}): {params}")
+            output(f"Всего обучено моделей: {fits}")
+            for line in profile_summary(
+                scores,
+                "Время и память по внешним фолдам (обучение - весь поиск в фолде)",
+                "Время по шагам конвейера (все кандидаты во внутренних фолдах)",
+            ):
+                output(line)
+            if cache_hits is not None:
+                hits, calls = cache_hits
+                output(
+                    f"Кэш преобразований (scaler, dimreduct): использовано "
+                    f"{hits} из {calls} "
+                    f"({round(100 * hits / max(calls, 1), 1)}%)"
+                )
+
+        run_job(
+            self.app,
+            f"hypersearch {config['model']} ({strategy}, scaler: "
+            f"{config['scaler']}, feateng: {config['feateng']}, dimreduct: "
+            f"{config['dimreduct']})",
+            search,
+            ns.background,
+            progress_totals(config["model"], parameters, strategy, budget),
+            ns.profile,
         )
 
 
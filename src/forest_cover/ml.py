@@ -1,8 +1,9 @@
 import cmd2
 import argparse
+import os
+import sys
 import warnings
-import pandas as pd
-import hashlib
+from concurrent.futures import CancelledError
 from typing import Any
 
 from .pathhandler import (
@@ -16,29 +17,39 @@ from .loadable import (
     LoadableTree,
     LoadableForest,
     LoadablekNN,
+    LoadableSGD,
+    LoadableNB,
     LoadableLogitHyperSearch,
     LoadableTreeHyperSearch,
     LoadableForestHyperSearch,
     LoadableKnnHyperSearch,
 )
-from .featureeng import make_new_features
-from .datahandler import load_data
+from .predict import CHUNK_ROWS
+from .jobs import JobQueue, JobCancelled
+from .tracking import flush, pending_runs, take_errors
 
 
 CONFIG_DEFAULTS: dict[str, Any] = {
     "loadpath": "data/train.csv",
     "dumppath": "data/model.joblib",
+    "cachedir": "data/.cache",
     "model": "logit",
     "scaler": "none",
     "dimreduct": "none",
     "feateng": "none",
+    "corrthreshold": 0.96,
+    "corrmemory": 256,
+    "dtypes": "default",
+    "memlimit": 0,
+    "pipecache": 512,
     "eval": 5,
+    "jobs": 0,
+    "logmodel": True,
+    "warmstart": False,
     "targetcolumn": "Cover_Type",
     "randomstate": 42,
 }
 
-FOREST_COVER_HASH = "44b7913f39ca108f39febca9f0aa00df821827a8"
-
 
 class MLApp(cmd2.Cmd):  # type: ignore
     def __init__(self) -> None:
@@ -67,11 +78,17 @@ class MLApp(cmd2.Cmd):  # type: ignore
 
         self.config = CONFIG_DEFAULTS
         self.data: tuple[Any, Any] = (None, None)
+        self.jobs = JobQueue(self.notify)
+        self.notices: list[str] = []
+        self.register_postloop_hook(self.stop_jobs)
+        self.register_postloop_hook(self.flush_runs)
 
         self._logit = LoadableLogit(self)
         self._tree = LoadableTree(self)
         self._forest = LoadableForest(self)
         self._knn = LoadablekNN(self)
+        self._sgd = LoadableSGD(self)
+        self._nb = LoadableNB(self)
 
         self._hypersearchlogit = LoadableLogitHyperSearch(self)
         self._hypersearchtree = LoadableTreeHyperSearch(self)
@@ -84,11 +101,14 @@ class MLApp(cmd2.Cmd):  # type: ignore
     setmodel_parser.add_argument(
         "algorythm",
         type=str,
-        choices=["logit", "tree", "forest", "knn"],
+        choices=["logit", "tree", "forest", "knn", "sgd", "nb"],
         help="Выберите один из следующих алгоритмов: "
         "логистическая регрессия (logit), "
         "дерево решений (tree), случайный лес "
-        "(forest) или k-ближайших соседей (knn)",
+        "(forest), k-ближайших соседей (knn) или "
+        "модели с потоковым обучением по частям CSV-файла: "
+        "логистическая регрессия методом SGD (sgd), "
+        "гауссовский наивный байес (nb)",
     )
 
     @cmd2.with_argparser(setmodel_parser)
@@ -101,16 +121,26 @@ class MLApp(cmd2.Cmd):  # type: ignore
             (self._tree, self._hypersearchtree),
             (self._forest, self._hypersearchforest),
             (self._knn, self._hypersearchknn),
+            (self._sgd,),
+            (self._nb,),
         ]:
             try:
-                self.unregister_command_set(command_set[0])
-                self.unregister_command_set(command_set[1])
+                for loaded in command_set:
+                    self.unregister_command_set(loaded)
             except ValueError:
                 pass
 
         try:
             self.register_command_set(getattr(self, f"_{ns.algorythm}"))
-            self.register_command_set(getattr(self, f"_hypersearch{ns.algorythm}"))
+            hypersearch = getattr(self, f"_hypersearch{ns.algorythm}", None)
+            if hypersearch is None:
+                self.poutput(
+                    f"Выбрана модель: {ns.algorythm} (потоковое обучение). "
+                    f'Настройте препроцессинг (список команд по "?") '
+                    f"или сразу перейдите к обучению (train)."
+                )
+                return
+            self.register_command_set(hypersearch)
             self.poutput(
                 f"Выбрана модель: {ns.algorythm}. Настройте "
                 f'препроцессинг (список команд по "?") '
@@ -177,6 +207,23 @@ class MLApp(cmd2.Cmd):  # type: ignore
 
     parser_dump.set_defaults(func=setpath_dump)
 
+    parser_cache = setpath_subparsers.add_parser(
+        "cache", help="задать папку для кэша " "загруженных датасетов"
+    )
+    parser_cache.add_argument(
+        "cache_dir", type=str, help="папка, в которой будет храниться кэш"
+    )
+
+    def setpath_cache(self, args: argparse.Namespace) -> None:
+        dirpath = make_abs_path(args.cache_dir)
+        if check_dir_exists(dirpath):
+            self.config["cachedir"] = dirpath
+            self.poutput(f"Установлена папка для кэша датасетов: {dirpath}")
+        else:
+            raise FileNotFoundError(f"Папка для размещения кэша не найдена ({dirpath})")
+
+    parser_cache.set_defaults(func=setpath_cache)
+
     @cmd2.with_argparser(setpath_parser)
     @cmd2.with_category("Настройки")
     def do_setpath(self, args: argparse.Namespace) -> None:
@@ -197,7 +244,7 @@ class MLApp(cmd2.Cmd):  # type: ignore
     @cmd2.with_argparser(paths_parser)
     def do_paths(self, args: argparse.Namespace) -> None:
         if args.reset:
-            for key in ["loadpath", "exportpath", "dumppath"]:
+            for key in ["loadpath", "dumppath", "cachedir"]:
                 self.config[key] = CONFIG_DEFAULTS[key]
             self.poutput("Установлены значения путей к файлам по умолчанию")
         else:
@@ -206,6 +253,8 @@ class MLApp(cmd2.Cmd):  # type: ignore
                 f" {make_abs_path(self.config['loadpath'])}\n"
                 f"Путь для выгрузки данных модели:"
                 f" {make_abs_path(self.config['dumppath'])}\n"
+                f"Папка для кэша датасетов:"
+                f" {make_abs_path(self.config['cachedir'])}\n"
             )
 
     # TARGETCOLUMN
@@ -220,8 +269,17 @@ class MLApp(cmd2.Cmd):  # type: ignore
     @cmd2.with_category("Настройки")  # type: ignore
     @cmd2.with_argparser(targetcolumn_parser)
     def do_targetcolumn(self, args: argparse.Namespace) -> None:
+        from .datahandler import load_data
+
         try:
-            self.data = load_data(self.config["loadpath"], args.column_name)
+            self.data = load_data(
+                self.config["loadpath"],
+                args.column_name,
+                self.config["cachedir"],
+                self.config["dtypes"] == "compact",
+                self.config["memlimit"] * 2**20,
+                self.poutput,
+            )
         except KeyError as e:
             raise KeyError(
                 f"В датасете по установленному пути отсутствует столбец "
@@ -251,6 +309,154 @@ class MLApp(cmd2.Cmd):  # type: ignore
             self.config["randomstate"] = args.random_state
             self.poutput(f"Установлено число random_state: {args.random_state}")
 
+    # MEMLIMIT
+
+    memlimit_parser = cmd2.Cmd2ArgumentParser()
+    memlimit_parser.add_argument(
+        "megabytes",
+        type=int,
+        help="лимит памяти (МБ) для потоковой загрузки датасета по частям "
+        "в отображаемую в память матрицу; 0 - загружать файл целиком "
+        "[по умолчанию: 0]",
+    )
+
+    @cmd2.with_category("Настройки")  # type: ignore
+    @cmd2.with_argparser(memlimit_parser)
+    def do_memlimit(self, args: argparse.Namespace) -> None:
+        if args.megabytes < 0:
+            self.poutput("Значение не установлено. Число не может быть отрицательным")
+        elif args.megabytes == 0:
+            self.config["memlimit"] = 0
+            self.poutput("Потоковая загрузка датасета отключена")
+        else:
+            self.config["memlimit"] = args.megabytes
+            self.poutput(
+                f"Установлен лимит памяти для потоковой загрузки датасета: "
+                f"{args.megabytes} МБ"
+            )
+
+    # PIPECACHE
+
+    pipecache_parser = cmd2.Cmd2ArgumentParser()
+    pipecache_parser.add_argument(
+        "megabytes",
+        type=int,
+        help="предельный размер (МБ) кэша обученных преобразований (scaler, "
+        "dimreduct), общих для кандидатов hypersearch в одном фолде; "
+        "0 - не кэшировать [по умолчанию: 512]",
+    )
+
+    @cmd2.with_category("Настройки")  # type: ignore
+    @cmd2.with_argparser(pipecache_parser)
+    def do_pipecache(self, args: argparse.Namespace) -> None:
+        if args.megabytes < 0:
+            self.poutput("Значение не установлено. Число не может быть отрицательным")
+        elif args.megabytes == 0:
+            self.config["pipecache"] = 0
+            self.poutput("Кэширование преобразований отключено")
+        else:
+            self.config["pipecache"] = args.megabytes
+            self.poutput(
+                f"Установлен предельный размер кэша преобразований: "
+                f"{args.megabytes} МБ"
+            )
+
+    # EVAL
+
+    eval_parser = cmd2.Cmd2ArgumentParser()
+    eval_parser.add_argument(
+        "folds",
+        type=int,
+        help="количество фолдов кросс-валидации при обучении модели "
+        "командой train [по умолчанию: 5]",
+    )
+
+    @cmd2.with_category("Настройки")  # type: ignore
+    @cmd2.with_argparser(eval_parser)
+    def do_eval(self, args: argparse.Namespace) -> None:
+        if args.folds < 2:
+            self.poutput(
+                "Значение не установлено. Число фолдов должно быть не меньше 2"
+            )
+        else:
+            self.config["eval"] = args.folds
+            self.poutput(f"Установлено количество фолдов кросс-валидации: {args.folds}")
+
+    # NJOBS
+
+    njobs_parser = cmd2.Cmd2ArgumentParser()
+    njobs_parser.add_argument(
+        "cores",
+        type=int,
+        help="общее число процессорных ядер для обучения; делится между "
+        "фолдами, кандидатами hypersearch, потоками модели и BLAS; "
+        "0 - все ядра [по умолчанию: 0]",
+    )
+
+    @cmd2.with_category("Настройки")  # type: ignore
+    @cmd2.with_argparser(njobs_parser)
+    def do_njobs(self, args: argparse.Namespace) -> None:
+        if args.cores < 0:
+            self.poutput("Значение не установлено. Число не может быть отрицательным")
+        elif args.cores == 0:
+            self.config["jobs"] = 0
+            self.poutput("Для обучения будут использоваться все ядра процессора")
+        else:
+            self.config["jobs"] = args.cores
+            self.poutput(f"Установлено число ядер для обучения: {args.cores}")
+
+    # LOGMODEL
+
+    logmodel_parser = cmd2.Cmd2ArgumentParser()
+    logmodel_parser.add_argument(
+        "mode",
+        type=str,
+        choices=["on", "off"],
+        help="сохранять ли обученную модель как артефакт запуска MLflow; "
+        "off ускоряет серии запусков, параметры и метрики записываются "
+        "в любом случае [по умолчанию: on]",
+    )
+
+    @cmd2.with_category("Настройки")  # type: ignore
+    @cmd2.with_argparser(logmodel_parser)
+    def do_logmodel(self, args: argparse.Namespace) -> None:
+        self.config["logmodel"] = args.mode == "on"
+        if self.config["logmodel"]:
+            self.poutput("Модель будет сохраняться как артефакт запуска MLflow")
+        else:
+            self.poutput(
+                "Сохранение модели в MLflow отключено: записываются только "
+                "параметры и метрики"
+            )
+
+    # WARMSTART
+
+    warmstart_parser = cmd2.Cmd2ArgumentParser()
+    warmstart_parser.add_argument(
+        "mode",
+        type=str,
+        choices=["on", "off"],
+        help="продолжать обучение forest и logit от моделей, обученных ранее "
+        "в этой сессии на тех же данных и настройках: лес достраивается до "
+        "нового n_estimators, логистическая регрессия начинает с прежнего "
+        "решения при новых C, max_iter, tol [по умолчанию: off]",
+    )
+
+    @cmd2.with_category("Настройки")  # type: ignore
+    @cmd2.with_argparser(warmstart_parser)
+    def do_warmstart(self, args: argparse.Namespace) -> None:
+        self.config["warmstart"] = args.mode == "on"
+        if self.config["warmstart"]:
+            self.poutput(
+                "Теплый старт включен: train для forest и logit будет "
+                "продолжать обучение сохраненных моделей фолдов"
+            )
+        else:
+            from .warmstart import clear_warm_cache
+
+            clear_warm_cache()
+            self.poutput("Теплый старт отключен, сохраненные модели фолдов удалены")
+
     # SCALER
 
     scaler_parser = cmd2.Cmd2ArgumentParser()
@@ -298,55 +504,383 @@ class MLApp(cmd2.Cmd):  # type: ignore
                 f"данных: {args.dimreduct}"
             )
 
+    # DTYPES
+
+    dtypes_parser = cmd2.Cmd2ArgumentParser()
+    dtypes_parser.add_argument(
+        "dtypes",
+        type=str,
+        choices=["default", "compact"],
+        help="compact = загрузка датасета с компактными типами данных "
+        "(uint8 для бинарных признаков, int16/int32 и float32 для "
+        "остальных, category для независимой переменной); "
+        "default = типы данных pandas по умолчанию",
+    )
+
+    @cmd2.with_category("Настройки")  # type: ignore
+    @cmd2.with_argparser(dtypes_parser)
+    def do_dtypes(self, args: argparse.Namespace) -> None:
+        if args.dtypes != self.config["dtypes"]:
+            self.config["dtypes"] = args.dtypes
+            self.config["feateng"] = "none"
+            self.data = (None, None)
+        self.poutput(f"Установлен режим типов данных при загрузке: {args.dtypes}")
+
     # FEATENG
 
     feateng_parser = cmd2.Cmd2ArgumentParser()
     feateng_parser.add_argument(
         "feateng",
         type=str,
-        choices=["none", "auto"],
+        choices=["none", "auto", "fast"],
         help="auto = набор методов feature engineering"
         " с использованием featuretools, "
         "подготовленный специально для датасета "
-        "из Kaggle Forest Cover Type Prediction",
+        "из Kaggle Forest Cover Type Prediction; "
+        "fast = тот же набор признаков, построенный "
+        "векторизованными операциями numpy без featuretools",
+    )
+    feateng_parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=None,
+        help="порог корреляции, начиная с которого из пары признаков "
+        "удаляется более сложный [по умолчанию: 0.96]",
+    )
+    feateng_parser.add_argument(
+        "-m",
+        "--memory",
+        type=int,
+        default=None,
+        help="лимит памяти (МБ) для поблочного расчета корреляций "
+        "между признаками [по умолчанию: 256]",
     )
 
     @cmd2.with_category("Препроцессинг")  # type: ignore
     @cmd2.with_argparser(feateng_parser)
     def do_feateng(self, args: argparse.Namespace) -> None:
+        from .datahandler import (
+            load_configured_data,
+            dataset_fingerprint,
+            matches_schema,
+        )
+        from .featureeng import make_configured_features
+
+        threshold = self.config["corrthreshold"]
+        if args.threshold is not None:
+            if not 0 < args.threshold <= 1:
+                self.poutput("Порог корреляции должен быть в пределах (0, 1]")
+                return
+            threshold = args.threshold
+        if args.memory is not None:
+            if args.memory < 1:
+                self.poutput("Лимит памяти должен быть положительным")
+                return
+            self.config["corrmemory"] = args.memory
         if args.feateng == "none":
-            self.data = load_data(self.config["loadpath"], self.config["targetcolumn"])
+            self.data = load_configured_data(self.config, self.poutput)
             self.poutput("Теперь будет использоваться оригинальный датасет")
             self.config["feateng"] = "none"
-        elif args.feateng == "auto":
-            if self.data[0] is None or self.config["feateng"] == "none":
-                self.data = load_data(
-                    self.config["loadpath"], self.config["targetcolumn"]
-                )
-                if (
-                    hashlib.sha1(
-                        pd.util.hash_pandas_object(self.data[0]).values
-                    ).hexdigest()
-                    != FOREST_COVER_HASH
-                ):
+        else:
+            if (
+                self.data[0] is None
+                or self.config["feateng"] != args.feateng
+                or self.config["corrthreshold"] != threshold
+            ):
+                self.config["corrthreshold"] = threshold
+                self.data = load_configured_data(self.config, self.poutput)
+                if not matches_schema(self.data[0]):
+                    self.config["feateng"] = "none"
                     self.poutput(
-                        "Эта опция доступна только для датасета "
+                        "Эта опция доступна только для датасетов в формате "
                         "Forest Cover Type Prediction"
                     )
                 else:
                     self.poutput("Проводим feature engineering...")
-                    self.data = make_new_features(self.data[0]), self.data[1]
+                    features = make_configured_features(
+                        self.config,
+                        self.data[0],
+                        dataset_fingerprint(self.data[0]),
+                        args.feateng,
+                    )
+                    self.data = features, self.data[1]
                     self.poutput(
                         "Успешно! Теперь будет использоваться "
                         "датасет с кастомными признаками"
                     )
-                    self.config["feateng"] = "auto"
+                    self.config["feateng"] = args.feateng
             else:
                 self.poutput("Feature engineering уже проведен")
 
+    # GENDATA
+
+    gendata_parser = cmd2.Cmd2ArgumentParser(
+        description="Генерация синтетического датасета в формате Forest Cover "
+        "Type Prediction с правдоподобными распределениями признаков по классам"
+    )
+    gendata_parser.add_argument("rows", type=int, help="число строк")
+    gendata_parser.add_argument(
+        "output_file", type=str, help="csv-файл для записи датасета"
+    )
+    gendata_parser.add_argument(
+        "-s",
+        "--seed",
+        type=int,
+        default=None,
+        help="зерно генератора [по умолчанию: значение randomstate]",
+    )
+    gendata_parser.add_argument(
+        "-c",
+        "--chunksize",
+        type=int,
+        default=None,
+        help="число строк, генерируемых и записываемых за один раз "
+        "[по умолчанию: 100000]",
+    )
+    gendata_parser.add_argument(
+        "-l",
+        "--load",
+        action="store_true",
+        help="использовать созданный датасет для анализа (см. setpath load)",
+    )
+
+    @cmd2.with_category("Препроцессинг")  # type: ignore
+    @cmd2.with_argparser(gendata_parser)
+    def do_gendata(self, args: argparse.Namespace) -> None:
+        from .synthetic import GENERATE_CHUNK_ROWS, write_dataset
+
+        chunksize = args.chunksize or GENERATE_CHUNK_ROWS
+        if args.rows < 1 or chunksize < 1:
+            self.poutput("Число строк должно быть положительным")
+            return
+        filepath = make_abs_path(args.output_file)
+        if not check_extension(filepath, "csv"):
+            raise ValueError("Указан путь к файлу с форматом, отличным от csv")
+        if not check_dir_exists(filepath):
+            raise FileNotFoundError(
+                f"Папка для записи датасета не найдена ({os.path.dirname(filepath)})"
+            )
+        seed = self.config["randomstate"] if args.seed is None else args.seed
+        rows = write_dataset(filepath, args.rows, seed, chunksize, self.poutput)
+        self.poutput(f"Успешно! Датасет из {rows} строк записан в {filepath}")
+        if args.load:
+            self.config["loadpath"] = filepath
+            self.config["feateng"] = "none"
+            self.data = (None, None)
+            self.poutput(f"Установлен путь к файлу датасета: {filepath}")
+
+    # PREDICT
+
+    predict_parser = cmd2.Cmd2ArgumentParser()
+    predict_parser.add_argument(
+        "input_file", type=str, help="CSV-файл с данными для предсказания"
+    )
+    predict_parser.add_argument(
+        "output_file", type=str, help="CSV-файл для записи предсказаний"
+    )
+    predict_parser.add_argument(
+        "-c",
+        "--chunksize",
+        type=int,
+        default=CHUNK_ROWS,
+        help=f"число строк, обрабатываемых за один раз [по умолчанию: {CHUNK_ROWS}]",
+    )
+    predict_parser.add_argument(
+        "-p",
+        "--proba",
+        action="store_true",
+        help="записать также вероятности классов",
+    )
+
+    @cmd2.with_category("Предсказание")  # type: ignore
+    @cmd2.with_argparser(predict_parser)
+    def do_predict(self, args: argparse.Namespace) -> None:
+        from .predict import load_model, predict_file
+
+        if args.chunksize < 1:
+            self.poutput("Число строк должно быть положительным")
+            return
+        model = load_model(self.config["dumppath"])
+        rows = predict_file(
+            model,
+            args.input_file,
+            args.output_file,
+            self.config["targetcolumn"],
+            args.chunksize,
+            args.proba,
+            self.poutput,
+        )
+        self.poutput(
+            f"Успешно! Предсказания для {rows} строк записаны в "
+            f"{make_abs_path(args.output_file)}"
+        )
+
+    # JOBS
+
+    def notify(self, message: str) -> None:
+        if self.use_rawinput and self.stdin.isatty():
+            if self.terminal_lock.acquire(blocking=False):
+                try:
+                    self.async_alert(message)
+                    return
+                finally:
+                    self.terminal_lock.release()
+        self.notices.append(message)
+
+    def postcmd(self, stop: bool, statement: Any) -> bool:
+        self.notices.extend(
+            f"Не удалось записать запуск в MLflow: {error}" for error in take_errors()
+        )
+        while self.notices:
+            self.poutput(self.notices.pop(0))
+        return stop
+
+    def stop_jobs(self) -> None:
+        if any(not job.future.done() for job in self.jobs.jobs.values()):
+            self.poutput("Отменяем незавершенные фоновые задачи...")
+        self.jobs.shutdown()
+
+    def flush_runs(self) -> None:
+        if pending_runs():
+            self.poutput("Дожидаемся записи запусков в MLflow...")
+        for error in flush():
+            self.poutput(f"Не удалось записать запуск в MLflow: {error}")
+
+    jobs_parser = cmd2.Cmd2ArgumentParser(
+        description="Показать фоновые задачи и ход их выполнения"
+    )
+
+    @cmd2.with_category("Фоновые задачи")  # type: ignore
+    @cmd2.with_argparser(jobs_parser)
+    def do_jobs(self, args: argparse.Namespace) -> None:
+        if not self.jobs.jobs:
+            self.poutput(
+                "Фоновых задач нет. Запустить задачу: 'train -b' или "
+                "'hypersearch -b'"
+            )
+            return
+        for job in self.jobs.jobs.values():
+            stages = job.stages()
+            self.poutput(
+                f"{job.id}. {job.description}: {job.status()}"
+                + (f", {round(job.elapsed(), 1)} с" if job.started else "")
+                + (f" (обработано {stages})" if stages else "")
+            )
+
+    wait_parser = cmd2.Cmd2ArgumentParser(
+        description="Дождаться завершения фоновой задачи и вывести ее результаты"
+    )
+    wait_parser.add_argument("job_id", type=int, help="номер задачи (см. 'jobs')")
+
+    @cmd2.with_category("Фоновые задачи")  # type: ignore
+    @cmd2.with_argparser(wait_parser)
+    def do_wait(self, args: argparse.Namespace) -> None:
+        job = self.jobs.get(args.job_id)
+        try:
+            job.future.result()
+        except (JobCancelled, CancelledError):
+            self.poutput(f"Задача {job.id} отменена")
+        finally:
+            for message in job.messages:
+                self.poutput(message)
+            self.notices = [
+                notice
+                for notice in self.notices
+                if not notice.startswith(f"Задача {job.id} ")
+            ]
+
+    cancel_parser = cmd2.Cmd2ArgumentParser(
+        description="Отменить фоновую задачу: задача из очереди снимается "
+        "сразу, выполняющаяся - после текущего фолда или кандидата"
+    )
+    cancel_parser.add_argument("job_id", type=int, help="номер задачи (см. 'jobs')")
+
+    @cmd2.with_category("Фоновые задачи")  # type: ignore
+    @cmd2.with_argparser(cancel_parser)
+    def do_cancel(self, args: argparse.Namespace) -> None:
+        if self.jobs.cancel(args.job_id):
+            self.poutput(f"Задача {args.job_id} отменена")
+        else:
+            self.poutput(f"Задача {args.job_id} уже завершена")
+
+    # CACHE
+
+    cache_parser = cmd2.Cmd2ArgumentParser()
+    cache_subparsers = cache_parser.add_subparsers(
+        title="подкоманды", help="справка по " "подкомандам:"
+    )
+    parser_cache_show = cache_subparsers.add_parser(
+        "show", help="показать сохраненные в кэше датасеты"
+    )
+    parser_cache_clear = cache_subparsers.add_parser(
+        "clear", help="удалить все сохраненные в кэше датасеты"
+    )
+
+    def cache_show(self, args: argparse.Namespace) -> None:
+        from .cachehandler import list_entries, entry_size, transformers_size
+
+        cache_dir = make_abs_path(self.config["cachedir"])
+        entries = list_entries(cache_dir)
+        transformers = transformers_size(cache_dir)
+        if not entries and not transformers:
+            self.poutput("Кэш датасетов пуст")
+            return
+        for entry, meta in entries:
+            if meta["kind"] == "features":
+                source = (
+                    f"feature engineering ({meta['engine']}, датасет: "
+                    f"{meta['dataset'][:12]}, порог корреляции: {meta['threshold']})"
+                )
+            else:
+                source = (
+                    f"{meta['csv']} (столбец: {meta['target']}, "
+                    f"типы данных: {meta['variant']}, "
+                    f"отпечаток: {meta['fingerprint'][:12]})"
+                )
+            self.poutput(
+                f"{source}: строк: {meta['rows']}, признаков: "
+                f"{len(meta['columns'])}, размер: "
+                f"{round(entry_size(entry) / 2**20, 1)} МБ"
+            )
+        if transformers:
+            self.poutput(
+                f"Обученные преобразования (scaler, dimreduct): размер: "
+                f"{round(transformers / 2**20, 1)} МБ"
+            )
+
+    parser_cache_show.set_defaults(func=cache_show)
+
+    def cache_clear(self, args: argparse.Namespace) -> None:
+        from .cachehandler import clear_cache
+
+        removed = clear_cache(make_abs_path(self.config["cachedir"]))
+        self.poutput(f"Кэш датасетов очищен (удалено записей: {removed})")
+
+    parser_cache_clear.set_defaults(func=cache_clear)
+
+    @cmd2.with_argparser(cache_parser)
+    @cmd2.with_category("Настройки")
+    def do_cache(self, args: argparse.Namespace) -> None:
+        func = getattr(args, "func", None)
+        if func is not None:
+            func(self, args)
+        else:
+            self.do_help("cache")
+
 
 def start() -> None:
     warnings.filterwarnings("ignore")
+    if sys.argv[1:2] == ["run"]:
+        from .runner import main as run_experiments
+
+        run_experiments(sys.argv[2:], CONFIG_DEFAULTS)
+        return
+    if sys.argv[1:2] == ["bench"]:
+        from .benchmark import main as run_benchmark
+
+        run_benchmark(sys.argv[2:], CONFIG_DEFAULTS)
+        return
     app = MLApp()
     app.cmdloop()
 
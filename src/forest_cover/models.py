@@ -1,41 +1,60 @@
+from importlib import import_module
 from typing import Union, Any
 
-from sklearn.linear_model import LogisticRegression
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.neighbors import KNeighborsClassifier
 
-
-MODELS: dict[str, Any] = {
-    "logit": LogisticRegression(),
-    "tree": DecisionTreeClassifier(),
-    "forest": RandomForestClassifier(),
-    "knn": KNeighborsClassifier(),
+MODELS: dict[str, tuple[str, str]] = {
+    "logit": ("sklearn.linear_model", "LogisticRegression"),
+    "tree": ("sklearn.tree", "DecisionTreeClassifier"),
+    "forest": ("sklearn.ensemble", "RandomForestClassifier"),
+    "knn": ("sklearn.neighbors", "KNeighborsClassifier"),
+    "sgd": ("sklearn.linear_model", "SGDClassifier"),
+    "nb": ("sklearn.naive_bayes", "GaussianNB"),
 }
+# models trained chunk by chunk with partial_fit
+STREAMING_MODELS = ["sgd", "nb"]
+STREAM_CHUNK_ROWS = 50000
+MIN_CHUNK_ROWS = 1000
+HOLDOUT = 0.1
+EPOCHS = 5
+
+COMMAND_OPTIONS = ["background", "profile", "chunksize", "holdout", "epochs"]
 
 NOT_SO_DEFAULT_PARAMETERS: dict[str, Any] = {
     "logit": {"max_iter": 1000},
     "tree": {},
     "forest": {},
     "knn": {},
+    "sgd": {"loss": "log_loss"},
+    "nb": {},
 }
 
 
-def set_model(
-    model: str, parameters: Union[dict[str, Any], None] = None
-) -> Union[
-    LogisticRegression,
-    DecisionTreeClassifier,
-    RandomForestClassifier,
-    KNeighborsClassifier,
-]:
-    if not parameters:
-        parameters = NOT_SO_DEFAULT_PARAMETERS[model]
-    return MODELS[model].set_params(**parameters)
+def create_estimator(
+    spec: tuple[str, str], parameters: Union[dict[str, Any], None] = None
+) -> Any:
+    module, name = spec
+    estimator = getattr(import_module(module), name)()
+    return estimator.set_params(**(parameters or {}))
+
+
+def legacy_loss(loss: Any) -> Any:
+    from sklearn import __version__
+
+    # scikit-learn before 1.1 names the logistic loss "log"
+    version = tuple(int(part) for part in __version__.split(".")[:2])
+    return "log" if loss == "log_loss" and version < (1, 1) else loss
+
+
+def create_model(model: str, parameters: Union[dict[str, Any], None] = None) -> Any:
+    parameters = {**NOT_SO_DEFAULT_PARAMETERS[model], **(parameters or {})}
+    if model == "sgd":
+        parameters["loss"] = legacy_loss(parameters["loss"])
+    return create_estimator(MODELS[model], parameters)
 
 
 def clean_parameters(parameters: dict[str, Any]) -> dict[str, Any]:
-    for key in list(parameters.keys()):
-        if key.startswith("cmd"):
-            del parameters[key]
-    return parameters
+    return {
+        key: value
+        for key, value in parameters.items()
+        if not key.startswith("cmd") and key not in COMMAND_OPTIONS
+    }
@@ -1,45 +1,56 @@
-from typing import Union
+from typing import Any
 
 from sklearn.pipeline import Pipeline
 
-from sklearn.linear_model import LogisticRegression
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.neighbors import NearestNeighbors
-
-from sklearn.preprocessing import StandardScaler
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.preprocessing import MaxAbsScaler
-from sklearn.preprocessing import RobustScaler
-
-from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
-from sklearn.decomposition import PCA
+from .models import create_estimator
 
 SCALERS = {
-    "standard": StandardScaler(),
-    "minmax": MinMaxScaler(),
-    "maxabs": MaxAbsScaler(),
-    "robust": RobustScaler(),
+    "standard": ("sklearn.preprocessing", "StandardScaler"),
+    "minmax": ("sklearn.preprocessing", "MinMaxScaler"),
+    "maxabs": ("sklearn.preprocessing", "MaxAbsScaler"),
+    "robust": ("sklearn.preprocessing", "RobustScaler"),
 }
-DIMREDUCTS = {"pca": PCA(), "lda": LinearDiscriminantAnalysis()}
+DIMREDUCTS = {
+    "pca": ("sklearn.decomposition", "PCA"),
+    "lda": ("sklearn.discriminant_analysis", "LinearDiscriminantAnalysis"),
+}
+# transformers with partial_fit for out-of-core training
+STREAMING_SCALERS = ["standard", "minmax", "maxabs"]
+STREAMING_DIMREDUCTS = {"pca": ("sklearn.decomposition", "IncrementalPCA")}
 
 
 def create_pipeline(
     scaler: str,
     dimreduct: str,
-    model: Union[
-        LogisticRegression,
-        DecisionTreeClassifier,
-        RandomForestClassifier,
-        NearestNeighbors,
-    ],
+    model: Any,
+    memory: Any = None,
 ) -> Pipeline:
     pipeline_steps = []
 
     if scaler != "none":
-        pipeline_steps.append(("sca", SCALERS[scaler]))
+        pipeline_steps.append(("sca", create_estimator(SCALERS[scaler])))
     if dimreduct != "none":
-        pipeline_steps.append(("dmr", DIMREDUCTS[dimreduct]))
+        pipeline_steps.append(("dmr", create_estimator(DIMREDUCTS[dimreduct])))
     pipeline_steps.append(("clf", model))
 
-    return Pipeline(steps=pipeline_steps)
+    return Pipeline(steps=pipeline_steps, memory=memory)
+
+
+def create_streaming_pipeline(scaler: str, dimreduct: str, model: Any) -> Pipeline:
+    if scaler != "none" and scaler not in STREAMING_SCALERS:
+        raise ValueError(
+            f"Алгоритм масштабирования {scaler} не поддерживает потоковое "
+            f"обучение. Доступные алгоритмы: {', '.join(STREAMING_SCALERS)}"
+        )
+    if dimreduct != "none" and dimreduct not in STREAMING_DIMREDUCTS:
+        raise ValueError(
+            f"Алгоритм снижения размерности {dimreduct} не поддерживает потоковое "
+            f"обучение. Доступные алгоритмы: {', '.join(STREAMING_DIMREDUCTS)}"
+        )
+    pipeline = create_pipeline(scaler, "none", model)
+    if dimreduct != "none":
+        pipeline.steps.insert(
+            len(pipeline.steps) - 1,
+            ("dmr", create_estimator(STREAMING_DIMREDUCTS[dimreduct])),
+        )
+    return pipeline
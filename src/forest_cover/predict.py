@@ -0,0 +1,150 @@
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Union
+
+import numpy as np
+from .pathhandler import make_abs_path, check_file_exists
+
+CHUNK_ROWS = 10000
+ID_COLUMN = "Id"
+
+
+def load_model(model_path: str) -> Any:
+    from joblib import load
+
+    model_path = make_abs_path(model_path)
+    if not check_file_exists(model_path):
+        raise FileNotFoundError(
+            f"Не найден файл модели ({model_path}). Обучите модель командой "
+            f"'train' или 'hypersearch' либо укажите путь командой 'setpath dump'"
+        )
+    return load(model_path)
+
+
+def model_columns(model: Any, header: Any, target_column: str) -> list[str]:
+    columns = getattr(model, "feature_names_in_", None)
+    if columns is None:
+        return [str(name) for name in header if name != target_column]
+    missing = [name for name in columns if name not in header]
+    if missing:
+        raise KeyError(
+            f"Во входном файле отсутствуют столбцы, на которых обучалась "
+            f"модель: {', '.join(map(str, missing[:5]))}"
+        )
+    return [str(name) for name in columns]
+
+
+def predict_chunk(model: Any, chunk: Any, columns: list[str], proba: bool) -> Any:
+    import pandas as pd
+
+    features = chunk[columns]
+    result = pd.DataFrame(index=chunk.index)
+    if ID_COLUMN in chunk:
+        result[ID_COLUMN] = chunk[ID_COLUMN].to_numpy()
+    if proba:
+        probabilities = model.predict_proba(features)
+        classes = model.classes_
+        result["prediction"] = classes[np.argmax(probabilities, axis=1)]
+        for i, name in enumerate(classes):
+            result[f"proba_{name}"] = probabilities[:, i]
+    else:
+        result["prediction"] = model.predict(features)
+    return result
+
+
+def predict_file(
+    model: Any,
+    input_path: str,
+    output_path: str,
+    target_column: str,
+    chunksize: int = CHUNK_ROWS,
+    proba: bool = False,
+    progress: Union[Callable[[str], None], None] = None,
+) -> int:
+    import pandas as pd
+
+    input_path = make_abs_path(input_path)
+    output_path = make_abs_path(output_path)
+    if not check_file_exists(input_path):
+        raise FileNotFoundError(
+            f"Не удалось найти файл с данными для предсказания ({input_path})"
+        )
+    header = pd.read_csv(input_path, nrows=0).columns
+    columns = model_columns(model, header, target_column)
+    usecols = columns + [ID_COLUMN] if ID_COLUMN in header else columns
+    usecols = list(dict.fromkeys(usecols))
+    rows = 0
+    started = time.perf_counter()
+    reader = pd.read_csv(input_path, chunksize=chunksize, usecols=usecols)
+    with ThreadPoolExecutor(max_workers=1) as executor, open(
+        output_path, "w", encoding="utf-8", newline=""
+    ) as output:
+        next_chunk = executor.submit(next, reader, None)
+        while True:
+            chunk = next_chunk.result()
+            if chunk is None:
+                break
+            next_chunk = executor.submit(next, reader, None)
+            result = predict_chunk(model, chunk, columns, proba)
+            result.to_csv(output, header=rows == 0, index=False)
+            rows += len(chunk)
+            if progress is not None:
+                elapsed = max(time.perf_counter() - started, 1e-9)
+                progress(f"Обработано строк: {rows} ({int(rows / elapsed)} строк/с)")
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Предсказание классов для CSV-файла обученной моделью"
+    )
+    parser.add_argument("input_file", help="CSV-файл с данными для предсказания")
+    parser.add_argument("output_file", help="CSV-файл для записи предсказаний")
+    parser.add_argument(
+        "-m",
+        "--model",
+        default="data/model.joblib",
+        help="файл модели joblib [по умолчанию: data/model.joblib]",
+    )
+    parser.add_argument(
+        "-t",
+        "--targetcolumn",
+        default="Cover_Type",
+        help="столбец с независимой переменной, который не передается модели "
+        "[по умолчанию: Cover_Type]",
+    )
+    parser.add_argument(
+        "-c",
+        "--chunksize",
+        type=int,
+        default=CHUNK_ROWS,
+        help=f"число строк в одной порции [по умолчанию: {CHUNK_ROWS}]",
+    )
+    parser.add_argument(
+        "-p",
+        "--proba",
+        action="store_true",
+        help="записать также вероятности классов",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="не выводить ход выполнения"
+    )
+    args = parser.parse_args()
+    if args.chunksize < 1:
+        parser.error("число строк в порции должно быть положительным")
+    rows = predict_file(
+        load_model(args.model),
+        args.input_file,
+        args.output_file,
+        args.targetcolumn,
+        args.chunksize,
+        args.proba,
+        None if args.quiet else lambda message: print(message, file=sys.stderr),
+    )
+    if not args.quiet:
+        print(
+            f"Предсказания для {rows} строк записаны в {args.output_file}",
+            file=sys.stderr,
+        )
@@ -0,0 +1,161 @@
+import cProfile
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Union
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+PEAK_RSS = "peak_rss"
+SCORING_STEP = "scoring"
+FOLD_METRICS = {
+    "fit_time_fold": "fit_time",
+    "score_time_fold": "score_time",
+    "peak_rss_mb_fold": PEAK_RSS,
+}
+
+
+def peak_rss(estimator: Any, features: Any, target: Any) -> float:
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return float(peak / 2**20 if sys.platform == "darwin" else peak / 2**10)
+
+
+def profile_scoring(scoring: Any) -> dict[str, Any]:
+    from sklearn.metrics import get_scorer
+
+    if not isinstance(scoring, dict):
+        scoring = {name: get_scorer(name) for name in scoring}
+    return {**scoring, PEAK_RSS: peak_rss}
+
+
+class StepTimer:
+    def __init__(self, memory: Any = None) -> None:
+        handle, self.path = tempfile.mkstemp(prefix="forest_cover_steps", suffix=".log")
+        os.close(handle)
+        self.memory = memory
+
+    def cache(self, func: Callable[..., Any], **options: Any) -> Callable[..., Any]:
+        cached = func if self.memory is None else self.memory.cache(func, **options)
+
+        def call(transformer: Any, *args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            result = cached(transformer, *args, **kwargs)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(
+                    f"{type(transformer).__name__} {time.perf_counter() - started}\n"
+                )
+            return result
+
+        return call
+
+    def totals(self) -> dict[str, tuple[int, float]]:
+        totals: dict[str, tuple[int, float]] = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                records = [line.split() for line in f]
+        except OSError:
+            records = []
+        for name, seconds in records:
+            count, total = totals.get(name, (0, 0.0))
+            totals[name] = count + 1, total + float(seconds)
+        return totals
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def add_profile(
+    scores: dict[str, Any],
+    timer: StepTimer,
+    model: Any,
+    fits: int,
+    fit_time: float,
+    scored: int,
+    score_time: float,
+) -> None:
+    steps = timer.totals()
+    transform_time = sum(total for _, total in steps.values())
+    # the classifier is not cached by the pipeline, so it gets the remaining time
+    steps[type(model).__name__] = fits, max(0.0, fit_time - transform_time)
+    steps[SCORING_STEP] = scored, score_time
+    scores[PEAK_RSS] = scores.pop(f"test_{PEAK_RSS}")
+    scores["steps"] = steps
+
+
+def profile_metrics(scores: dict[str, Any]) -> dict[str, float]:
+    metrics = {
+        "fit_time": float(sum(scores["fit_time"])),
+        "score_time": float(sum(scores["score_time"])),
+    }
+    if not np.isnan(scores[PEAK_RSS]).all():
+        metrics["peak_rss_mb"] = float(np.nanmax(scores[PEAK_RSS]))
+    for name, (_, total) in scores["steps"].items():
+        metrics[f"time_{name}"] = total
+    return metrics
+
+
+def format_table(header: list[str], rows: list[list[Any]]) -> list[str]:
+    cells = [header] + [
+        [f"{value:.3f}" if isinstance(value, float) else str(value) for value in row]
+        for row in rows
+    ]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(header))]
+    return [
+        "  ".join(
+            [row[0].ljust(widths[0])]
+            + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+        )
+        for row in cells
+    ]
+
+
+def profile_summary(
+    scores: dict[str, Any], fold_title: str, step_title: str
+) -> list[str]:
+    folds = [
+        [i + 1, float(fit), float(score), f"{float(rss):.1f}"]
+        for i, (fit, score, rss) in enumerate(
+            zip(scores["fit_time"], scores["score_time"], scores[PEAK_RSS])
+        )
+    ]
+    steps = [
+        [name, count, total, total / max(count, 1)]
+        for name, (count, total) in scores["steps"].items()
+    ]
+    return (
+        [f"{fold_title}:"]
+        + format_table(["фолд", "обучение, с", "оценка, с", "пик RSS, МБ"], folds)
+        + [f"{step_title}:"]
+        + format_table(["шаг", "вызовов", "всего, с", "среднее, с"], steps)
+    )
+
+
+def profiled(
+    func: Callable[[Callable[[str], None], Any], None], path: str
+) -> Callable[[Callable[[str], None], Any], None]:
+    def call(output: Callable[[str], None], progress: Union[Any, None]) -> None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            func(output, progress)
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+            output(
+                f"Профиль выполнения записан в {path} "
+                f"(просмотр: python -m pstats {path})"
+            )
+
+    return call
@@ -0,0 +1,253 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Union
+
+import numpy as np
+import yaml
+from .models import create_model, MODELS
+from .pipeline import create_pipeline, SCALERS, DIMREDUCTS
+from .train import train
+from .scheduler import cpu_budget
+from .datahandler import load_configured_data, dataset_fingerprint, matches_schema
+from .featureeng import make_configured_features, FeatureEngineer, ENGINES
+from .pathhandler import make_abs_path
+from .cachehandler import write_shared, read_shared, remove_shared, SHARED_DIR
+from .tracking import flush
+
+MATRIX_KEYS = ["model", "scaler", "dimreduct", "feateng"]
+VARIANT_KEYS = ["loadpath", "targetcolumn", "dtypes", "memlimit", "cachedir"]
+FEATURE_KEYS = ["feateng", "corrthreshold", "corrmemory"]
+DEFAULT_DUMPDIR = "data/runs"
+
+
+def read_experiments(path: str) -> dict[str, Any]:
+    path = make_abs_path(path)
+    try:
+        with open(path, encoding="utf-8") as f:
+            experiments = yaml.safe_load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Не найден файл с описанием экспериментов ({path})")
+    if not isinstance(experiments, dict):
+        raise ValueError(
+            "Файл экспериментов должен содержать словарь с ключами matrix, "
+            "runs, config, params, cpus"
+        )
+    return experiments
+
+
+def expand_runs(
+    experiments: dict[str, Any], defaults: dict[str, Any]
+) -> list[dict[str, Any]]:
+    base = {**defaults, **experiments.get("config", {})}
+    unknown = set(base) - set(defaults)
+    if unknown:
+        raise KeyError(f"Неизвестные параметры настройки: {', '.join(unknown)}")
+    runs = []
+    matrix = experiments.get("matrix", {})
+    if matrix:
+        values = [matrix.get(key, base[key]) for key in MATRIX_KEYS]
+        values = [value if isinstance(value, list) else [value] for value in values]
+        for combination in itertools.product(*values):
+            runs.append({**base, **dict(zip(MATRIX_KEYS, combination))})
+    for run in experiments.get("runs", []):
+        runs.append({**base, **run})
+    if not runs:
+        raise ValueError("В файле экспериментов не задано ни одного запуска")
+    params = experiments.get("params", {})
+    for run in runs:
+        run["params"] = {**params.get(run["model"], {}), **run.get("params", {})}
+    check_runs(runs)
+    for i, run in enumerate(runs):
+        run["name"] = "-".join(str(run[key]) for key in MATRIX_KEYS)
+        run["dumppath"] = os.path.join(
+            make_abs_path(experiments.get("dumpdir", DEFAULT_DUMPDIR)),
+            f"{i:03d}-{run['name']}.joblib",
+        )
+    return runs
+
+
+def check_runs(runs: list[dict[str, Any]]) -> None:
+    choices = {
+        "model": list(MODELS),
+        "scaler": ["none", *SCALERS],
+        "dimreduct": ["none", *DIMREDUCTS],
+        "feateng": ["none", *ENGINES],
+    }
+    # checked before any dataset is loaded or worker process is started
+    errors = {
+        f"{key}: {run[key]} (допустимые значения: {', '.join(values)})": None
+        for run in runs
+        for key, values in choices.items()
+        if run[key] not in values
+    }
+    for run in runs:
+        if run["model"] not in MODELS:
+            continue
+        valid = create_model(run["model"]).get_params()
+        unknown = [name for name in run["params"] if name not in valid]
+        if unknown:
+            errors[f"params {run['model']}: {', '.join(unknown)} (нет у модели)"] = None
+    if errors:
+        raise ValueError(
+            "Недопустимые значения в файле экспериментов: " + "; ".join(errors)
+        )
+
+
+def prepare_datasets(runs: list[dict[str, Any]]) -> dict[Any, Any]:
+    datasets: dict[Any, Any] = {}
+    raw: dict[Any, Any] = {}
+    for run in runs:
+        variant = tuple(run[key] for key in VARIANT_KEYS)
+        key = variant + tuple(run[key] for key in FEATURE_KEYS)
+        if key in datasets:
+            continue
+        if variant not in raw:
+            print(f"Загружаем датасет {run['loadpath']}...", file=sys.stderr)
+            data = load_configured_data(run)
+            raw[variant] = data, matches_schema(data[0])
+        data, eligible = raw[variant]
+        if run["feateng"] == "none":
+            datasets[key] = data, None
+        elif not eligible:
+            datasets[key] = None
+        else:
+            print(
+                f"Проводим feature engineering ({run['feateng']})...", file=sys.stderr
+            )
+            features = make_configured_features(
+                run, data[0], dataset_fingerprint(data[0]), run["feateng"]
+            )
+            step = FeatureEngineer(list(features.columns)).fit(data[0])
+            datasets[key] = (features, data[1]), step
+    return datasets
+
+
+def share_dataset(dataset: Any, location: str) -> Any:
+    if dataset is None:
+        return None
+    (features, target), step = dataset
+    shared = write_shared(location, features)
+    if shared is None:
+        return dataset
+    return (shared, target), step
+
+
+def run_experiment(
+    run: dict[str, Any], dataset: Any, pipeline: Any
+) -> Union[float, str]:
+    if dataset is None:
+        return (
+            "feateng доступен только для датасетов "
+            "в формате Forest Cover Type Prediction"
+        )
+    (features, target), step = dataset
+    if isinstance(features, dict):
+        features = read_shared(features)
+    scores = train(pipeline, (features, target), run["params"], run, step)
+    errors = flush()
+    if errors:
+        return f"не удалось записать запуск в MLflow: {'; '.join(errors)}"
+    return float(np.mean(scores["test_balanced_accuracy"]))
+
+
+def execute_runs(
+    runs: list[dict[str, Any]],
+    datasets: dict[Any, Any],
+    pipelines: list[Any],
+    parallel: int,
+) -> bool:
+    with ProcessPoolExecutor(
+        max_workers=parallel,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=warnings.filterwarnings,
+        initargs=("ignore",),
+    ) as executor:
+        futures = [
+            executor.submit(
+                run_experiment,
+                run,
+                datasets[tuple(run[key] for key in VARIANT_KEYS + FEATURE_KEYS)],
+                pipeline,
+            )
+            for run, pipeline in zip(runs, pipelines)
+        ]
+        succeeded = True
+        for run, future in zip(runs, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = f"{type(e).__name__}: {e}"
+            if isinstance(result, float):
+                print(f"{run['name']}: accuracy (balanced): {round(result, 4)}")
+            else:
+                succeeded = False
+                print(f"{run['name']}: ошибка: {result}")
+    return succeeded
+
+
+def run_experiments(experiments: dict[str, Any], runs: list[dict[str, Any]]) -> bool:
+    cpus = cpu_budget({"jobs": int(experiments.get("cpus", runs[0]["jobs"]))})
+    folds = max(run["eval"] for run in runs)
+    parallel = max(1, min(len(runs), cpus // folds))
+    for run in runs:
+        run["jobs"] = max(1, cpus // parallel)
+    os.makedirs(os.path.dirname(runs[0]["dumppath"]), exist_ok=True)
+    location = os.path.join(make_abs_path(runs[0]["cachedir"]), SHARED_DIR)
+    pipelines = [
+        create_pipeline(
+            run["scaler"], run["dimreduct"], create_model(run["model"], run["params"])
+        )
+        for run in runs
+    ]
+    datasets = {
+        key: share_dataset(dataset, location)
+        for key, dataset in prepare_datasets(runs).items()
+    }
+    print(
+        f"Запусков: {len(runs)}, одновременно: {parallel}, "
+        f"ядер на запуск: {runs[0]['jobs']}",
+        file=sys.stderr,
+    )
+    started = time.perf_counter()
+    try:
+        succeeded = execute_runs(runs, datasets, pipelines, parallel)
+    finally:
+        for dataset in datasets.values():
+            if dataset is not None and isinstance(dataset[0][0], dict):
+                remove_shared(dataset[0][0]["path"])
+    print(f"Завершено за {round(time.perf_counter() - started, 1)} с", file=sys.stderr)
+    return succeeded
+
+
+def main(argv: list[str], defaults: dict[str, Any]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="ml run",
+        description="Пакетный запуск экспериментов, описанных в файле YAML",
+    )
+    parser.add_argument("experiments", help="файл YAML с описанием экспериментов")
+    parser.add_argument(
+        "-c",
+        "--cpus",
+        type=int,
+        default=None,
+        help="общее число процессорных ядер для всех запусков "
+        "[по умолчанию: значение из файла или все ядра]",
+    )
+    args = parser.parse_args(argv)
+    experiments = read_experiments(args.experiments)
+    if args.cpus is not None:
+        if args.cpus < 1:
+            parser.error("число ядер должно быть положительным")
+        experiments["cpus"] = args.cpus
+    try:
+        runs = expand_runs(experiments, defaults)
+    except (KeyError, ValueError) as e:
+        parser.error(str(e.args[0]))
+    if not run_experiments(experiments, runs):
+        sys.exit(1)
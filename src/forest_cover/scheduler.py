@@ -0,0 +1,45 @@
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from joblib import cpu_count, parallel_backend
+from sklearn.pipeline import Pipeline
+from threadpoolctl import threadpool_limits
+
+
+def cpu_budget(config: dict[str, Any]) -> int:
+    if config["jobs"] > 0:
+        return int(config["jobs"])
+    return int(cpu_count())
+
+
+def split_budget(
+    cores: int, outer_tasks: int, inner_tasks: int = 1
+) -> tuple[int, int, int]:
+    outer = max(1, min(outer_tasks, cores))
+    per_outer = max(1, cores // outer)
+    inner = max(1, min(inner_tasks, per_outer))
+    threads = max(1, per_outer // inner)
+    return outer, inner, threads
+
+
+def set_estimator_threads(pipeline: Pipeline, threads: int) -> Pipeline:
+    if "clf__n_jobs" in pipeline.get_params():
+        pipeline.set_params(clf__n_jobs=threads)
+    return pipeline
+
+
+@contextmanager
+def limit_threads(threads: int) -> Iterator[None]:
+    with threadpool_limits(limits=threads):
+        yield
+
+
+@contextmanager
+def limit_worker_threads(workers: int, threads: int) -> Iterator[None]:
+    # forcing loky would override the threading backend forests prefer,
+    # so it is only set where worker processes are actually started
+    if workers > 1:
+        with parallel_backend("loky", inner_max_num_threads=threads):
+            yield
+    else:
+        yield
@@ -0,0 +1,231 @@
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Union
+
+import numpy as np
+import pandas as pd
+from .predict import load_model
+
+MAX_BATCH = 64
+MAX_WAIT_MS = 5.0
+LATENCY_WINDOW = 10000
+REQUEST_TIMEOUT = 60
+LISTEN_BACKLOG = 128
+
+
+class MicroBatcher:
+    def __init__(self, model: Any, max_batch: int, max_wait: float) -> None:
+        self.model = model
+        self.columns = [str(name) for name in model.feature_names_in_]
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests: queue.Queue[Any] = queue.Queue()
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.batch_sizes: Counter[int] = Counter()
+        self.lock = threading.Lock()
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def submit(self, rows: list[dict[str, Any]], proba: bool) -> Future[Any]:
+        for row in rows:
+            missing = [name for name in self.columns if name not in row]
+            if missing:
+                raise KeyError(
+                    f"В запросе отсутствуют столбцы, на которых обучалась "
+                    f"модель: {', '.join(missing[:5])}"
+                )
+        future: Future[Any] = Future()
+        self.requests.put((rows, proba, future, time.perf_counter()))
+        return future
+
+    def collect(self) -> list[Any]:
+        batch = [self.requests.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def run(self) -> None:
+        while True:
+            batch = self.collect()
+            try:
+                results = self.predict([row for item in batch for row in item[0]])
+            except Exception:
+                for item in batch:
+                    self.finish([item], None)
+                continue
+            self.finish(batch, results)
+
+    def predict(self, rows: list[dict[str, Any]]) -> tuple[Any, Any]:
+        features = pd.DataFrame.from_records(rows, columns=self.columns)
+        probabilities = self.model.predict_proba(features)
+        predictions = self.model.classes_[np.argmax(probabilities, axis=1)]
+        return predictions, probabilities
+
+    def finish(self, batch: list[Any], results: Union[tuple[Any, Any], None]) -> None:
+        if results is None:
+            try:
+                results = self.predict(batch[0][0])
+            except Exception as e:
+                batch[0][2].set_exception(e)
+                return
+        predictions, probabilities = results
+        finished = time.perf_counter()
+        start = 0
+        with self.lock:
+            self.batch_sizes[len(predictions)] += 1
+            for rows, proba, future, received in batch:
+                stop = start + len(rows)
+                response: dict[str, Any] = {
+                    "prediction": predictions[start:stop].tolist()
+                }
+                if proba:
+                    response["proba"] = [
+                        dict(zip(map(str, self.model.classes_), row))
+                        for row in probabilities[start:stop].tolist()
+                    ]
+                future.set_result(response)
+                self.latencies.append(finished - received)
+                start = stop
+
+    def stats(self) -> dict[str, Any]:
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            batch_sizes = dict(sorted(self.batch_sizes.items()))
+        if len(latencies) == 0:
+            return {"requests": 0, "batches": batch_sizes}
+        return {
+            "requests": len(latencies),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+            "batches": batch_sizes,
+        }
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+
+def make_handler(batcher: MicroBatcher) -> type[BaseHTTPRequestHandler]:
+    class PredictionHandler(BaseHTTPRequestHandler):
+        def reply(self, status: int, body: dict[str, Any]) -> None:
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self) -> None:
+            if self.path == "/stats":
+                self.reply(200, batcher.stats())
+            elif self.path == "/health":
+                self.reply(200, {"status": "ok"})
+            else:
+                self.reply(404, {"error": f"Неизвестный адрес {self.path}"})
+
+        def do_POST(self) -> None:
+            if self.path.split("?")[0] != "/predict":
+                self.reply(404, {"error": f"Неизвестный адрес {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length))
+                rows = body if isinstance(body, list) else [body]
+                if not rows or not all(isinstance(row, dict) for row in rows):
+                    raise ValueError(
+                        "Тело запроса должно быть объектом JSON или списком "
+                        "объектов вида {столбец: значение}"
+                    )
+                future = batcher.submit(rows, "proba" in self.path)
+            except (ValueError, KeyError) as e:
+                self.reply(400, {"error": str(e).strip("'\"")})
+                return
+            try:
+                self.reply(200, future.result(timeout=REQUEST_TIMEOUT))
+            except Exception as e:
+                self.reply(400, {"error": f"Не удалось выполнить предсказание: {e}"})
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return PredictionHandler
+
+
+def make_server(
+    model: Any, host: str, port: int, max_batch: int, max_wait: float
+) -> tuple[PredictionServer, MicroBatcher]:
+    batcher = MicroBatcher(model, max_batch, max_wait)
+    return PredictionServer((host, port), make_handler(batcher)), batcher
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="HTTP-сервер предсказаний с объединением запросов в пакеты"
+    )
+    parser.add_argument(
+        "-m",
+        "--model",
+        default="data/model.joblib",
+        help="файл модели joblib [по умолчанию: data/model.joblib]",
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="адрес [по умолчанию: 127.0.0.1]"
+    )
+    parser.add_argument(
+        "-p", "--port", type=int, default=8000, help="порт [по умолчанию: 8000]"
+    )
+    parser.add_argument(
+        "-b",
+        "--max-batch",
+        type=int,
+        default=MAX_BATCH,
+        help=f"максимальное число строк в пакете [по умолчанию: {MAX_BATCH}]",
+    )
+    parser.add_argument(
+        "-w",
+        "--max-wait",
+        type=float,
+        default=MAX_WAIT_MS,
+        help="максимальное время ожидания (мс) для наполнения пакета "
+        f"[по умолчанию: {MAX_WAIT_MS}]",
+    )
+    args = parser.parse_args()
+    if args.max_batch < 1 or args.max_wait < 0:
+        parser.error("размер пакета должен быть положительным, время - неотрицательным")
+    server, batcher = make_server(
+        load_model(args.model),
+        args.host,
+        args.port,
+        args.max_batch,
+        args.max_wait / 1000,
+    )
+    print(
+        f"Сервер запущен: http://{args.host}:{server.server_address[1]}/predict "
+        f"(статистика: /stats). Остановка: Ctrl+C",
+        file=sys.stderr,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(batcher.stats(), ensure_ascii=False), file=sys.stderr)
@@ -0,0 +1,201 @@
+import time
+from typing import Any, Callable, Iterator, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.pipeline import Pipeline
+
+from .datahandler import Fingerprint, missing_column_error
+from .jobs import Progress
+from .pathhandler import make_abs_path, check_file_exists
+from .models import STREAM_CHUNK_ROWS, HOLDOUT
+from .profiling import PEAK_RSS, SCORING_STEP, peak_rss
+
+# ROC AUC needs all scores at once, so it is computed on a uniform sample
+AUC_SAMPLE_ROWS = 100000
+
+
+def holdout_keys(start: int, rows: int, seed: int) -> Any:
+    # uniform values that depend only on the row position, not on the chunking
+    positions = pd.DataFrame(
+        {"seed": np.full(rows, seed), "row": np.arange(start, start + rows)}
+    )
+    return pd.util.hash_pandas_object(positions, index=False).to_numpy() / 2.0**64
+
+
+def read_classes(csv_path: str, target_column: str, chunksize: int) -> Any:
+    classes = np.array([], dtype=np.int64)
+    for chunk in pd.read_csv(csv_path, usecols=[target_column], chunksize=chunksize):
+        classes = np.union1d(classes, chunk[target_column].unique())
+    return classes
+
+
+def read_chunks(
+    csv_path: str,
+    target_column: str,
+    chunksize: int,
+    seed: int,
+    progress: Union[Progress, None] = None,
+) -> Iterator[tuple[pd.DataFrame, pd.Series, Any]]:
+    start = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        target = chunk.pop(target_column)
+        yield chunk, target, holdout_keys(start, len(chunk), seed)
+        start += len(chunk)
+        if progress is not None:
+            progress.report("chunk")
+
+
+def transform(steps: list[Any], features: Any) -> Any:
+    for step in steps:
+        features = step.transform(features)
+    return features
+
+
+def stream_scores(
+    confusion: Any, target: Any, proba: Any, classes: Any
+) -> dict[str, float]:
+    support = confusion.sum(axis=1)
+    predicted = confusion.sum(axis=0)
+    correct = np.diag(confusion)
+    recall = np.divide(correct, support, out=np.zeros(len(classes)), where=support > 0)
+    precision = np.divide(
+        correct, predicted, out=np.zeros(len(classes)), where=predicted > 0
+    )
+    f1 = np.divide(
+        2 * precision * recall,
+        precision + recall,
+        out=np.zeros(len(classes)),
+        where=precision + recall > 0,
+    )
+    try:
+        auc = float(
+            roc_auc_score(
+                target, proba, multi_class="ovo", average="weighted", labels=classes
+            )
+        )
+    except ValueError:
+        auc = float("nan")
+    return {
+        "balanced_accuracy": float(recall[support > 0].mean()),
+        "f1_weighted": float((f1 * support).sum() / max(support.sum(), 1)),
+        "roc_auc_ovo_weighted": auc,
+    }
+
+
+def stream_train(
+    pipeline: Pipeline,
+    config: dict[str, Any],
+    chunksize: int = STREAM_CHUNK_ROWS,
+    holdout: float = HOLDOUT,
+    epochs: int = 1,
+    progress: Union[Progress, None] = None,
+    output: Callable[[str], None] = print,
+) -> dict[str, Any]:
+    csv_path = make_abs_path(config["loadpath"])
+    if not check_file_exists(csv_path):
+        raise FileNotFoundError(
+            f"Не удалось загрузить файл с датасетом по указанному пути "
+            f"({csv_path}). Обновите путь командой 'setpath load'"
+        )
+    target_column = config["targetcolumn"]
+    if target_column not in pd.read_csv(csv_path, nrows=0).columns:
+        raise missing_column_error(target_column)
+    seed = config["randomstate"]
+    classes = read_classes(csv_path, target_column, chunksize)
+    steps: dict[str, tuple[int, float]] = {}
+    fitted: list[Any] = []
+
+    def train_chunks(stage: str, epoch: int = 0) -> Iterator[tuple[Any, Any]]:
+        rows = 0
+        started = time.perf_counter()
+        for index, (features, target, keys) in enumerate(
+            read_chunks(csv_path, target_column, chunksize, seed, progress)
+        ):
+            # rows are shuffled inside a chunk: the file may be sorted by class
+            order = np.random.RandomState([seed, epoch, index]).permutation(
+                len(features)
+            )
+            order = order[keys[order] >= holdout]
+            if len(order):
+                rows += len(order)
+                yield features.iloc[order], target.iloc[order]
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        output(f"{stage}: строк: {rows} ({int(rows / elapsed)} строк/с)")
+
+    def fit_step(step: Any, features: Any, target: Any, **options: Any) -> None:
+        name = type(step).__name__
+        started = time.perf_counter()
+        step.partial_fit(transform(fitted, features), target, **options)
+        calls, seconds = steps.get(name, (0, 0.0))
+        steps[name] = calls + 1, seconds + time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _, step in pipeline.steps[:-1]:
+        for features, target in train_chunks(type(step).__name__):
+            # IncrementalPCA needs at least as many rows as components
+            if len(features) >= features.shape[1]:
+                fit_step(step, features, target)
+        fitted.append(step)
+    model = pipeline.steps[-1][1]
+    train_rows = 0
+    for epoch in range(epochs):
+        for features, target in train_chunks(f"Эпоха {epoch + 1}/{epochs}", epoch):
+            fit_step(model, features, target, classes=classes)
+            if epoch == 0:
+                train_rows += len(features)
+    fit_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    fingerprint = Fingerprint()
+    confusion = np.zeros((len(classes), len(classes)), dtype=np.int64)
+    sample_keys = np.empty(0)
+    sample_target = np.empty(0, dtype=classes.dtype)
+    sample_proba = np.empty((0, len(classes)))
+    calls = 0
+    for features, target, keys in read_chunks(
+        csv_path, target_column, chunksize, seed, progress
+    ):
+        fingerprint.update(features)
+        rows = keys < holdout
+        if not rows.any():
+            continue
+        calls += 1
+        transformed = transform(fitted, features[rows])
+        predicted = model.predict(transformed)
+        np.add.at(
+            confusion,
+            (
+                np.searchsorted(classes, target[rows]),
+                np.searchsorted(classes, predicted),
+            ),
+            1,
+        )
+        sample_keys = np.concatenate([sample_keys, keys[rows]])
+        sample_target = np.concatenate([sample_target, target[rows]])
+        sample_proba = np.concatenate([sample_proba, model.predict_proba(transformed)])
+        if len(sample_keys) > AUC_SAMPLE_ROWS:
+            # the rows with the smallest keys form a uniform sample
+            kept = np.argpartition(sample_keys, AUC_SAMPLE_ROWS)[:AUC_SAMPLE_ROWS]
+            sample_keys = sample_keys[kept]
+            sample_target = sample_target[kept]
+            sample_proba = sample_proba[kept]
+    score_time = time.perf_counter() - started
+    if not confusion.any():
+        raise ValueError(
+            "В отложенную выборку не попало ни одной строки. Увеличьте ее долю"
+        )
+    scores: dict[str, Any] = {
+        "fit_time": np.array([fit_time]),
+        "score_time": np.array([score_time]),
+        PEAK_RSS: np.array([peak_rss(None, None, None)]),
+        "steps": {**steps, SCORING_STEP: (calls, score_time)},
+        "rows": (train_rows, int(confusion.sum())),
+        "fingerprint": fingerprint.hexdigest(),
+    }
+    for name, value in stream_scores(
+        confusion, sample_target, sample_proba, classes
+    ).items():
+        scores[f"test_{name}"] = np.array([value])
+    return scores
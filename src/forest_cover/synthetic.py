@@ -0,0 +1,164 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Union
+
+import numpy as np
+import pandas as pd
+
+from .datahandler import FLAG_COLUMNS, NUMERIC_COLUMNS, SCHEMA_COLUMNS
+
+TARGET_COLUMN = "Cover_Type"
+COVER_TYPES = 7
+# per-class mean and common standard deviation, roughly as in the Kaggle data
+CLASS_PROFILES: dict[str, tuple[list[float], float]] = {
+    "Elevation": ([3128, 2920, 2394, 2223, 2787, 2419, 3362], 150),
+    "Aspect": ([157, 153, 176, 138, 139, 180, 153], 105),
+    "Slope": ([13, 13, 20, 18, 18, 19, 14], 7),
+    "Horizontal_Distance_To_Hydrology": ([270, 280, 210, 110, 210, 160, 350], 180),
+    "Vertical_Distance_To_Hydrology": ([40, 45, 60, 40, 50, 55, 70], 50),
+    "Horizontal_Distance_To_Roadways": (
+        [2600, 2400, 950, 900, 1350, 1050, 2700],
+        1000,
+    ),
+    "Hillshade_9am": ([211, 213, 201, 224, 219, 193, 216], 25),
+    "Hillshade_Noon": ([223, 225, 215, 220, 225, 209, 221], 20),
+    "Hillshade_3pm": ([144, 142, 140, 111, 135, 148, 137], 40),
+    "Horizontal_Distance_To_Fire_Points": (
+        [2000, 2100, 900, 860, 1580, 1060, 2070],
+        1000,
+    ),
+}
+COLUMN_LIMITS = {
+    "Elevation": (1800, 3900),
+    "Aspect": (0, 360),
+    "Slope": (0, 66),
+    "Horizontal_Distance_To_Hydrology": (0, 1400),
+    "Vertical_Distance_To_Hydrology": (-170, 600),
+    "Horizontal_Distance_To_Roadways": (0, 7000),
+    "Hillshade_9am": (0, 255),
+    "Hillshade_Noon": (0, 255),
+    "Hillshade_3pm": (0, 255),
+    "Horizontal_Distance_To_Fire_Points": (0, 7000),
+}
+WILDERNESS_PROBABILITIES = [
+    [0.47, 0.08, 0.45, 0.0],
+    [0.53, 0.04, 0.42, 0.01],
+    [0.0, 0.0, 0.43, 0.57],
+    [0.0, 0.0, 0.0, 1.0],
+    [0.55, 0.0, 0.45, 0.0],
+    [0.0, 0.0, 0.47, 0.53],
+    [0.34, 0.09, 0.57, 0.0],
+]
+SOIL_CONCENTRATION = 0.3
+SOIL_SEED = 42
+GENERATE_CHUNK_ROWS = 100000
+COLUMNS = [*SCHEMA_COLUMNS, TARGET_COLUMN]
+
+
+def soil_probabilities() -> Any:
+    # fixed per-class soil mixtures, independent of the generator seed
+    soils = len(FLAG_COLUMNS) - len(WILDERNESS_PROBABILITIES[0])
+    return np.random.RandomState(SOIL_SEED).dirichlet(
+        np.full(soils, SOIL_CONCENTRATION), size=COVER_TYPES
+    )
+
+
+def one_hot(choices: Any, width: int) -> Any:
+    flags = np.zeros((len(choices), width), dtype=np.int64)
+    flags[np.arange(len(choices)), choices] = 1
+    return flags
+
+
+def sample_categories(random: Any, probabilities: Any, classes: Any) -> Any:
+    cumulative = np.cumsum(probabilities, axis=1)[classes]
+    draws = random.random_sample((len(classes), 1))
+    return np.minimum((draws > cumulative).sum(axis=1), probabilities.shape[1] - 1)
+
+
+def sample_rows(
+    rows: int, random_state: Any = 42, first_id: int = 1
+) -> tuple[pd.DataFrame, Any, Any, Any]:
+    random = np.random.RandomState(random_state)
+    classes = random.randint(0, COVER_TYPES, size=rows)
+    columns: dict[str, Any] = {"Id": np.arange(first_id, first_id + rows)}
+    for name in NUMERIC_COLUMNS:
+        means, deviation = CLASS_PROFILES[name]
+        values = random.normal(np.asarray(means)[classes], deviation)
+        low, high = COLUMN_LIMITS[name]
+        columns[name] = np.rint(np.clip(values, low, high)).astype(np.int64)
+    wilderness = sample_categories(
+        random, np.asarray(WILDERNESS_PROBABILITIES), classes
+    )
+    soil = sample_categories(random, soil_probabilities(), classes)
+    return pd.DataFrame(columns), wilderness, soil, classes
+
+
+def make_dataset(rows: int, random_state: Any = 42, first_id: int = 1) -> pd.DataFrame:
+    numeric, wilderness, soil, classes = sample_rows(rows, random_state, first_id)
+    areas = len(WILDERNESS_PROBABILITIES[0])
+    flags = np.hstack(
+        [one_hot(wilderness, areas), one_hot(soil, len(FLAG_COLUMNS) - areas)]
+    )
+    columns = dict(numeric.items())
+    columns.update(zip(FLAG_COLUMNS, flags.T))
+    columns[TARGET_COLUMN] = classes + 1
+    return pd.DataFrame(columns, columns=COLUMNS)
+
+
+def flag_strings(width: int) -> list[str]:
+    return [
+        ",".join("1" if i == j else "0" for j in range(width)) for i in range(width)
+    ]
+
+
+def format_rows(numeric: pd.DataFrame, wilderness: Any, soil: Any, classes: Any) -> str:
+    # one-hot flags are joined from precomputed strings: far faster than to_csv
+    areas = len(WILDERNESS_PROBABILITIES[0])
+    area_flags = np.asarray(flag_strings(areas), dtype=object)
+    soil_flags = np.asarray(flag_strings(len(FLAG_COLUMNS) - areas), dtype=object)
+    lines = numeric.to_csv(header=False, index=False).splitlines()
+    return "".join(
+        f"{line},{area},{soil_type},{target}\n"
+        for line, area, soil_type, target in zip(
+            lines, area_flags[wilderness], soil_flags[soil], classes + 1
+        )
+    )
+
+
+def write_dataset(
+    path: str,
+    rows: int,
+    random_state: int = 42,
+    chunksize: int = GENERATE_CHUNK_ROWS,
+    progress: Union[Callable[[str], None], None] = None,
+) -> int:
+    # chunks are seeded by their index, so each one is generated independently
+    def chunk(start: int) -> Union[str, None]:
+        if start >= rows:
+            return None
+        size = min(chunksize, rows - start)
+        return format_rows(
+            *sample_rows(size, [random_state, start // chunksize], start + 1)
+        )
+
+    start = written = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=1) as executor, open(
+        path, "w", encoding="utf-8", newline=""
+    ) as output:
+        output.write(",".join(COLUMNS) + "\n")
+        next_chunk = executor.submit(chunk, 0)
+        while True:
+            text = next_chunk.result()
+            if text is None:
+                break
+            start += chunksize
+            next_chunk = executor.submit(chunk, start)
+            output.write(text)
+            written = min(start, rows)
+            if progress is not None:
+                elapsed = max(time.perf_counter() - started, 1e-9)
+                progress(
+                    f"Записано строк: {written} ({int(written / elapsed)} строк/с)"
+                )
+    return written
@@ -0,0 +1,129 @@
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Union
+
+LOG_WORKERS = 1
+RUN_NAME_TAG = "mlflow.runName"
+DEFAULT_EXPERIMENT = "0"
+EXPERIMENT_NAME_VARIABLE = "MLFLOW_EXPERIMENT_NAME"
+EXPERIMENT_ID_VARIABLE = "MLFLOW_EXPERIMENT_ID"
+# MLflow rejects batches above these sizes
+BATCH_METRICS = 1000
+BATCH_PARAMS = 100
+
+_executor: Union[ThreadPoolExecutor, None] = None
+_pending: list[Future[None]] = []
+_errors: list[str] = []
+_lock = threading.Lock()
+
+
+class RunLog:
+    def __init__(self, run_name: str) -> None:
+        self.run_name = run_name
+        self.params: dict[str, str] = {}
+        self.metrics: list[tuple[str, float, int]] = []
+        self.tags: dict[str, str] = {}
+
+    def log_params(self, params: dict[str, Any]) -> None:
+        self.params.update({key: str(value) for key, value in params.items()})
+
+    def set_tags(self, tags: dict[str, Any]) -> None:
+        self.tags.update({key: str(value) for key, value in tags.items()})
+
+    def log_metrics(self, metrics: dict[str, float], step: int = 0) -> None:
+        self.metrics.extend((key, float(value), step) for key, value in metrics.items())
+
+
+def experiment_id(client: Any) -> str:
+    name = os.environ.get(EXPERIMENT_NAME_VARIABLE)
+    if name:
+        experiment = client.get_experiment_by_name(name)
+        if experiment is not None:
+            return str(experiment.experiment_id)
+        return str(client.create_experiment(name))
+    return os.environ.get(EXPERIMENT_ID_VARIABLE) or DEFAULT_EXPERIMENT
+
+
+def write_run(log: RunLog, model: Any = None, artifact_path: str = "") -> None:
+    import mlflow.sklearn
+    from mlflow.entities import Metric, Param
+    from mlflow.tracking import MlflowClient
+
+    client = MlflowClient()
+    run_id = client.create_run(
+        experiment_id(client),
+        tags={**log.tags, RUN_NAME_TAG: log.run_name},
+    ).info.run_id
+    status = "FAILED"
+    try:
+        timestamp = int(time.time() * 1000)
+        metrics = [
+            Metric(key, value, timestamp, step) for key, value, step in log.metrics
+        ]
+        params = [Param(key, value) for key, value in log.params.items()]
+        for start in range(0, len(metrics), BATCH_METRICS):
+            stop = start + BATCH_METRICS
+            client.log_batch(run_id, metrics=metrics[start:stop])
+        for start in range(0, len(params), BATCH_PARAMS):
+            stop = start + BATCH_PARAMS
+            client.log_batch(run_id, params=params[start:stop])
+        if model is not None:
+            location = tempfile.mkdtemp(prefix="forest_cover_model")
+            try:
+                mlflow.sklearn.save_model(
+                    model,
+                    os.path.join(location, artifact_path),
+                    serialization_format="cloudpickle",
+                )
+                client.log_artifacts(run_id, location)
+            finally:
+                shutil.rmtree(location, ignore_errors=True)
+        status = "FINISHED"
+    finally:
+        client.set_terminated(run_id, status)
+
+
+def record(log: RunLog, model: Any = None, artifact_path: str = "") -> None:
+    try:
+        write_run(log, model, artifact_path)
+    except Exception as e:
+        with _lock:
+            _errors.append(f"{log.run_name}: {e}")
+
+
+def submit_run(log: RunLog, model: Any = None, artifact_path: str = "") -> Future[None]:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=LOG_WORKERS, thread_name_prefix="forest_cover_mlflow"
+            )
+            atexit.register(flush)
+        future = _executor.submit(record, log, model, artifact_path)
+        _pending[:] = [f for f in _pending if not f.done()] + [future]
+    return future
+
+
+def pending_runs() -> int:
+    with _lock:
+        return sum(not future.done() for future in _pending)
+
+
+def take_errors() -> list[str]:
+    with _lock:
+        errors = list(_errors)
+        _errors.clear()
+    return errors
+
+
+def flush() -> list[str]:
+    with _lock:
+        pending = list(_pending)
+    for future in pending:
+        future.result()
+    return take_errors()
@@ -1,17 +1,31 @@
 from joblib import dump
 from .pathhandler import make_abs_path
-from typing import Any
+from .cachehandler import shared_matrix
+from .scheduler import cpu_budget, split_budget, set_estimator_threads, limit_threads
+from .scheduler import limit_worker_threads
+from .jobs import Progress, progress_scoring
+from .tracking import RunLog, submit_run
+from .datahandler import dataset_fingerprint
+from .warmstart import warm_start_enabled, warm_validate
+from .profiling import StepTimer, profile_scoring, add_profile, profile_metrics
+from .profiling import FOLD_METRICS
+from typing import Any, Union
 
 import numpy as np
 import pandas as pd
-import mlflow
-import mlflow.sklearn
 
+from sklearn.base import clone
 from sklearn.pipeline import Pipeline
 from sklearn.model_selection import cross_validate
 from sklearn.model_selection import KFold
 
+DATASET_TAG = "dataset_fingerprint"
 SCORING = ["balanced_accuracy", "f1_weighted", "roc_auc_ovo_weighted"]
+METRICS = {
+    "accuracy_balanced": "test_balanced_accuracy",
+    "F1_weighted": "test_f1_weighted",
+    "ROC_AUC": "test_roc_auc_ovo_weighted",
+}
 
 
 def train(
@@ -19,33 +33,132 @@ def train(
     data: tuple[pd.DataFrame, pd.Series],
     parameters: dict[str, Any],
     config: dict[str, Any],
-    hypersearch: bool = False,
+    features: Any = None,
+    progress: Union[Progress, None] = None,
 ) -> Any:
-    with mlflow.start_run(
-        run_name=f"{config['model']} "
-        f"(hypersearch: {str(hypersearch)}, "
-        f"folds={config['eval']}, "
-        f"rand={config['randomstate']})"
-    ):
-        cv_procedure = KFold(
-            n_splits=5, shuffle=True, random_state=config["randomstate"]
+    cv_procedure = KFold(
+        n_splits=config["eval"], shuffle=True, random_state=config["randomstate"]
+    )
+    warm = warm_start_enabled(config)
+    # warm-started folds run one after another, so the model gets all cores
+    outer, _, threads = split_budget(cpu_budget(config), 1 if warm else config["eval"])
+    scoring: Any = SCORING
+    if progress is not None:
+        scoring = progress_scoring(SCORING, progress, "fold")
+    pipeline = set_estimator_threads(clone(pipeline), threads)
+    timer = StepTimer(pipeline.memory)
+    try:
+        if warm:
+            with limit_threads(threads):
+                scores, fitted_pipeline = warm_validate(
+                    pipeline,
+                    data,
+                    config,
+                    cv_procedure,
+                    profile_scoring(scoring),
+                    timer,
+                )
+        else:
+            scores, fitted_pipeline = cold_validate(
+                pipeline, data, config, cv_procedure, scoring, timer, outer, threads
+            )
+        add_profile(
+            scores,
+            timer,
+            pipeline.steps[-1][1],
+            config["eval"],
+            float(np.sum(scores["fit_time"])),
+            config["eval"],
+            float(np.sum(scores["score_time"])),
         )
+    finally:
+        timer.remove()
+    log_run(
+        fitted_pipeline,
+        scores,
+        parameters,
+        config,
+        config["eval"],
+        features=features,
+        dataset=dataset_fingerprint(data[0]),
+    )
+    return scores
+
+
+def cold_validate(
+    pipeline: Pipeline,
+    data: tuple[pd.DataFrame, pd.Series],
+    config: dict[str, Any],
+    cv: Any,
+    scoring: Any,
+    timer: StepTimer,
+    outer: int,
+    threads: int,
+) -> tuple[dict[str, Any], Pipeline]:
+    with limit_threads(threads), limit_worker_threads(outer, threads), shared_matrix(
+        make_abs_path(config["cachedir"]), data[0]
+    ) as matrix:
         scores = cross_validate(
-            pipeline, data[0], data[1], cv=cv_procedure, scoring=SCORING, n_jobs=-1
+            clone(pipeline).set_params(memory=timer),
+            matrix,
+            data[1],
+            cv=cv,
+            scoring=profile_scoring(scoring),
+            n_jobs=outer,
+        )
+    # the full-data fit starts once the folds are freed and gets every core
+    cores = cpu_budget(config)
+    with limit_threads(cores):
+        final = set_estimator_threads(clone(pipeline), cores).fit(data[0], data[1])
+    return scores, final
+
+
+def log_run(
+    pipeline: Pipeline,
+    scores: dict[str, Any],
+    parameters: dict[str, Any],
+    config: dict[str, Any],
+    folds: int,
+    hypersearch: bool = False,
+    features: Any = None,
+    dataset: Union[str, None] = None,
+) -> None:
+    if features is not None:
+        pipeline = Pipeline(steps=[("fe", features), *pipeline.steps])
+    dump(pipeline, make_abs_path(config["dumppath"]))
+    log = RunLog(
+        f"{config['model']} "
+        f"(hypersearch: {str(hypersearch)}, "
+        f"folds={folds}, "
+        f"rand={config['randomstate']})"
+    )
+    if dataset is not None:
+        log.set_tags({DATASET_TAG: dataset})
+    log.log_params(
+        {
+            "SCALER": config["scaler"],
+            "FEATENG": config["feateng"],
+            "DIMREDUCT": config["dimreduct"],
+        }
+    )
+    if hypersearch:
+        parameters = {k[5:]: v for k, v in parameters.items()}
+    log.log_params(parameters)
+    log.log_metrics(
+        {name: float(np.mean(scores[key])) for name, key in METRICS.items()}
+    )
+    log.log_metrics(profile_metrics(scores))
+    for fold in range(folds):
+        log.log_metrics(
+            {f"{name}_fold": float(scores[key][fold]) for name, key in METRICS.items()},
+            step=fold,
         )
-        mlflow.log_param("SCALER", config["scaler"])
-        mlflow.log_param("FEATENG", config["feateng"])
-        mlflow.log_param("DIMREDUCT", config["dimreduct"])
-        if hypersearch:
-            parameters = {k[5:]: v for k, v in parameters.items()}
-        mlflow.log_params(parameters)
-        mlflow.log_metrics(
+        log.log_metrics(
             {
-                "accuracy_balanced": float(np.mean(scores["test_balanced_accuracy"])),
-                "F1_weighted": float(np.mean(scores["test_f1_weighted"])),
-                "ROC_AUC": float(np.mean(scores["test_roc_auc_ovo_weighted"])),
-            }
+                name: float(scores[key][fold])
+                for name, key in FOLD_METRICS.items()
+                if not np.isnan(scores[key][fold])
+            },
+            step=fold,
         )
-        mlflow.sklearn.log_model(pipeline, config["model"])
-        dump(pipeline, make_abs_path(config["dumppath"]))
-        return scores
+    submit_run(log, pipeline if config["logmodel"] else None, config["model"])
@@ -0,0 +1,133 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.pipeline import Pipeline
+
+from .datahandler import dataset_fingerprint
+from .profiling import StepTimer
+
+WARM_CACHE_SIZE = 3
+# parameters that may change between runs while the fitted model is reused
+INCREMENTAL_PARAMETERS = {
+    "forest": {"n_estimators"},
+    "logit": {"C", "max_iter", "tol"},
+}
+RUNTIME_PARAMETERS = {"n_jobs", "verbose", "warm_start"}
+KEY_SETTINGS = ["model", "scaler", "dimreduct", "feateng", "eval", "randomstate"]
+
+_models: OrderedDict[str, dict[str, Any]] = OrderedDict()
+_lock = threading.Lock()
+
+
+def warm_start_enabled(config: dict[str, Any]) -> bool:
+    return bool(config["warmstart"]) and config["model"] in INCREMENTAL_PARAMETERS
+
+
+def warm_key(pipeline: Pipeline, features: pd.DataFrame, config: dict[str, Any]) -> str:
+    variable = INCREMENTAL_PARAMETERS[config["model"]] | RUNTIME_PARAMETERS
+    fixed = {
+        name: value
+        for name, value in pipeline.steps[-1][1].get_params().items()
+        if name not in variable
+    }
+    return repr(
+        [
+            dataset_fingerprint(features),
+            *[config[name] for name in KEY_SETTINGS],
+            sorted(fixed.items()),
+        ]
+    )
+
+
+def can_continue(model: str, fitted: Any, estimator: Any) -> bool:
+    if model == "forest":
+        # a forest can only grow: warm_start refuses to drop fitted trees
+        return bool(estimator.n_estimators >= len(fitted.estimators_))
+    return True
+
+
+def fit_warm(
+    pipeline: Pipeline,
+    fitted: Union[Pipeline, None],
+    model: str,
+    features: Any,
+    target: Any,
+    timer: Union[StepTimer, None] = None,
+) -> tuple[Pipeline, bool]:
+    estimator = pipeline.steps[-1][1]
+    if fitted is None or not can_continue(model, fitted.steps[-1][1], estimator):
+        cold = clone(pipeline).set_params(memory=timer).fit(features, target)
+        return cold.set_params(memory=None), False
+    changed = {
+        name: value
+        for name, value in estimator.get_params().items()
+        if name in INCREMENTAL_PARAMETERS[model] | {"n_jobs"}
+    }
+    # the transformers were fitted on the same rows, so only the model is refit
+    if len(fitted.steps) > 1:
+        features = fitted[:-1].transform(features)
+    fitted.steps[-1][1].set_params(**changed, warm_start=True).fit(features, target)
+    fitted.steps[-1][1].set_params(warm_start=False)
+    return fitted, True
+
+
+def warm_validate(
+    pipeline: Pipeline,
+    data: tuple[pd.DataFrame, pd.Series],
+    config: dict[str, Any],
+    cv: Any,
+    scoring: dict[str, Callable[..., Any]],
+    timer: StepTimer,
+) -> tuple[dict[str, Any], Pipeline]:
+    features, target = data
+    model = config["model"]
+    key = warm_key(pipeline, features, config)
+    with _lock:
+        entry = _models.pop(key, None)
+    folds = entry["folds"] if entry is not None else [None] * config["eval"]
+    scores: dict[str, Any] = {"fit_time": [], "score_time": []}
+    scores.update({f"test_{name}": [] for name in scoring})
+    fitted_folds = []
+    reused = 0
+    for fold, (train_rows, test_rows) in enumerate(cv.split(features, target)):
+        started = time.perf_counter()
+        fitted, warm = fit_warm(
+            pipeline,
+            folds[fold],
+            model,
+            features.iloc[train_rows],
+            target.iloc[train_rows],
+            timer,
+        )
+        scores["fit_time"].append(time.perf_counter() - started)
+        fitted_folds.append(fitted)
+        reused += warm
+        started = time.perf_counter()
+        for name, scorer in scoring.items():
+            scores[f"test_{name}"].append(
+                scorer(fitted, features.iloc[test_rows], target.iloc[test_rows])
+            )
+        scores["score_time"].append(time.perf_counter() - started)
+    # the final model is dumped and logged, so the cached one is not grown in place
+    final = None if entry is None else copy.deepcopy(entry["final"])
+    final, warm = fit_warm(pipeline, final, model, features, target)
+    scores = {name: np.asarray(values) for name, values in scores.items()}
+    scores["warm_folds"] = reused
+    with _lock:
+        _models[key] = {"folds": fitted_folds, "final": final}
+        while len(_models) > WARM_CACHE_SIZE:
+            _models.popitem(last=False)
+    return scores, final
+
+
+def clear_warm_cache() -> int:
+    with _lock:
+        cleared = len(_models)
+        _models.clear()
+    return cleared
@@ -0,0 +1,59 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.ml import CONFIG_DEFAULTS
+from forest_cover.benchmark import run_benchmark, compare_results
+
+
+def test_benchmark_run(tmp_path, monkeypatch):
+    monkeypatch.setenv("MLFLOW_ALLOW_FILE_STORE", "true")
+    lines = []
+    results = run_benchmark(
+        CONFIG_DEFAULTS,
+        [300],
+        ["load", "feateng", "train"],
+        ["tree"],
+        ["none"],
+        ["none", "pca"],
+        ["fast"],
+        output=lines.append,
+    )
+    stages = [
+        (result["stage"], result.get("dimreduct")) for result in results["results"]
+    ]
+    assert stages == [
+        ("load", None),
+        ("load", None),
+        ("feateng", None),
+        ("train", "none"),
+        ("train", "pca"),
+    ]
+    assert all("error" not in result for result in results["results"])
+    assert all(result["peak_mb"] is not None for result in results["results"])
+    assert 0 <= results["results"][-1]["accuracy"] <= 1
+    assert len(lines) == 5
+
+
+def test_compare_results():
+    base = {
+        "results": [
+            {"stage": "train", "rows": 10, "model": "knn", "seconds": 1.0},
+            {"stage": "load", "rows": 10, "cache": True, "seconds": 1.0},
+            {"stage": "load", "rows": 10, "cache": False, "seconds": 0.01},
+        ]
+    }
+    new = {
+        "results": [
+            {"stage": "train", "rows": 10, "model": "knn", "seconds": 1.5},
+            {"stage": "load", "rows": 10, "cache": True, "seconds": 1.05},
+            {"stage": "load", "rows": 10, "cache": False, "seconds": 0.02},
+            {"stage": "train", "rows": 20, "model": "knn", "seconds": 2.0},
+        ]
+    }
+    lines, regressions = compare_results(base, new, 0.1)
+    assert regressions == 1
+    assert lines[0].endswith("РЕГРЕССИЯ")
+    assert not lines[1].endswith("РЕГРЕССИЯ")
+    assert not lines[2].endswith("РЕГРЕССИЯ")
+    assert lines[3].endswith("нет в базовом файле")
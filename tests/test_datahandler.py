@@ -0,0 +1,110 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.datahandler import load_data, dataset_fingerprint
+from forest_cover.cachehandler import (
+    list_entries,
+    clear_cache,
+    shared_matrix,
+    SHARED_DIR,
+)
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "train.csv"
+    pd.DataFrame(
+        {
+            "Id": [1, 2, 3, 4],
+            "Elevation": [2596, 2590, 2804, 2785],
+            "Soil_Type1": [0, 1, 0, 0],
+            "Cover_Type": [5, 5, 2, 2],
+        }
+    ).to_csv(path, index=False)
+    return str(path)
+
+
+def test_load_data_cached(csv_file, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    features, target = load_data(csv_file, "Cover_Type", cache_dir)
+    assert len(list_entries(cache_dir)) == 1
+    cached_features, cached_target = load_data(csv_file, "Cover_Type", cache_dir)
+    assert features.equals(cached_features)
+    assert target.equals(cached_target)
+
+
+def test_load_data_cache_invalidated(csv_file, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    load_data(csv_file, "Cover_Type", cache_dir)
+    pd.DataFrame({"Id": [1], "Cover_Type": [3]}).to_csv(csv_file, index=False)
+    features, target = load_data(csv_file, "Cover_Type", cache_dir)
+    assert list(features.columns) == ["Id"]
+    assert len(list_entries(cache_dir)) == 1
+    assert clear_cache(cache_dir) == 1
+    assert list_entries(cache_dir) == []
+
+
+def test_load_data_compact(csv_file, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    for _ in range(2):
+        features, target = load_data(csv_file, "Cover_Type", cache_dir, compact=True)
+        assert features["Soil_Type1"].dtype == "uint8"
+        assert features["Elevation"].dtype == "int16"
+        assert target.dtype == "category"
+        assert target.tolist() == [5, 5, 2, 2]
+    default_features, _ = load_data(csv_file, "Cover_Type", cache_dir)
+    assert dataset_fingerprint(features) == dataset_fingerprint(default_features)
+    assert len(list_entries(cache_dir)) == 2
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_load_data_streamed(csv_file, tmp_path, compact):
+    cache_dir = str(tmp_path / "cache")
+    messages = []
+    features, target = load_data(
+        csv_file, "Cover_Type", cache_dir, compact, 1, messages.append
+    )
+    expected_features, expected_target = load_data(csv_file, "Cover_Type")
+    assert messages
+    assert list_entries(cache_dir)[0][1]["layout"] == "matrix"
+    assert (features.to_numpy() == expected_features.to_numpy()).all()
+    assert target.tolist() == expected_target.tolist()
+    assert (target.dtype == "category") == compact
+    if compact:
+        assert features["Soil_Type1"].dtype == "uint8"
+        assert features["Elevation"].dtype == "int32"
+        assert dataset_fingerprint(features) == dataset_fingerprint(expected_features)
+
+
+@pytest.mark.parametrize(
+    "memlimit, compact, copies", [(0, True, 1), (1, True, 1), (1, False, 0)]
+)
+def test_shared_matrix(csv_file, tmp_path, memlimit, compact, copies):
+    cache_dir = str(tmp_path / "cache")
+    shared_dir = tmp_path / "cache" / SHARED_DIR
+    for _ in range(2):
+        features, _ = load_data(csv_file, "Cover_Type", cache_dir, compact, memlimit)
+    with shared_matrix(cache_dir, features) as matrix:
+        assert isinstance(matrix, np.ndarray)
+        assert matrix.flags["C_CONTIGUOUS"]
+        assert (matrix == features.to_numpy()).all()
+        assert len(list(shared_dir.glob("*"))) == copies
+    assert list(shared_dir.glob("*")) == []
+
+
+@pytest.mark.parametrize("memlimit", [0, 1])
+def test_fingerprint_stored_in_cache(csv_file, tmp_path, memlimit):
+    cache_dir = str(tmp_path / "cache")
+    load_data(csv_file, "Cover_Type", cache_dir, False, memlimit)
+    fingerprint = list_entries(cache_dir)[0][1]["fingerprint"]
+    features, _ = load_data(csv_file, "Cover_Type", cache_dir, False, memlimit)
+    assert dataset_fingerprint(features) == fingerprint
+    recomputed = features.copy()
+    recomputed.attrs.clear()
+    assert dataset_fingerprint(recomputed) == fingerprint
+    assert dataset_fingerprint(features.drop(columns="Id")) != fingerprint
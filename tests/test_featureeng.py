@@ -0,0 +1,127 @@
+import featuretools as ft
+import numpy as np
+import pandas as pd
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover import featureeng
+from forest_cover.cachehandler import stored_fingerprint
+from forest_cover.featureeng import (
+    make_new_features,
+    correlated_columns,
+    FeatureEngineer,
+    IGNORED_COLUMNS,
+)
+
+NUMERIC_COLUMNS = [
+    "Elevation",
+    "Aspect",
+    "Slope",
+    "Horizontal_Distance_To_Hydrology",
+    "Vertical_Distance_To_Hydrology",
+    "Horizontal_Distance_To_Roadways",
+    "Hillshade_9am",
+    "Hillshade_Noon",
+    "Hillshade_3pm",
+    "Horizontal_Distance_To_Fire_Points",
+]
+
+
+def forest_cover_sample(rows):
+    rng = np.random.default_rng(42)
+    data = {"Id": np.arange(1, rows + 1)}
+    for name in NUMERIC_COLUMNS:
+        data[name] = rng.integers(-100, 3000, rows)
+    data["Hillshade_3pm"] = data["Hillshade_9am"] // 2 + rng.integers(0, 20, rows)
+    area = rng.integers(0, 4, rows)
+    for i in range(4):
+        data[f"Wilderness_Area{i + 1}"] = (area == i).astype(int)
+    soil = rng.integers(0, 40, rows)
+    for i in range(40):
+        data[f"Soil_Type{i + 1}"] = (soil == i).astype(int)
+    return pd.DataFrame(data)
+
+
+def test_fast_features_match_featuretools():
+    sample = forest_cover_sample(400)
+    expected = make_new_features(sample)
+    fast = make_new_features(sample, engine="fast")
+    assert "Hillshade_3pm - Hillshade_9am" not in expected.columns
+    assert list(fast.columns) == list(expected.columns)
+    np.testing.assert_allclose(
+        fast.to_numpy(dtype=float), expected.to_numpy(dtype=float), rtol=1e-9
+    )
+
+
+def test_feature_engineer_matches_training_features():
+    sample = forest_cover_sample(400)
+    expected = make_new_features(sample, engine="fast")
+    engineer = FeatureEngineer(list(expected.columns)).fit(sample)
+    chunks = [engineer.transform(sample.iloc[i : i + 150]) for i in range(0, 400, 150)]
+    transformed = pd.concat(chunks, ignore_index=True)
+    assert list(transformed.columns) == list(expected.columns)
+    np.testing.assert_allclose(
+        transformed.to_numpy(dtype=float), expected.to_numpy(dtype=float), rtol=1e-9
+    )
+
+
+def test_pruning_matches_featuretools():
+    sample = forest_cover_sample(400)
+    entityset = ft.EntitySet()
+    entityset.add_dataframe(
+        dataframe_name="data", dataframe=sample, make_index=True, index="index"
+    )
+    feature_matrix, _ = ft.dfs(
+        entityset=entityset,
+        target_dataframe_name="data",
+        trans_primitives=["add_numeric", "subtract_numeric", "percentile"],
+        ignore_columns={"data": IGNORED_COLUMNS},
+        max_depth=1,
+    )
+    expected = ft.selection.remove_highly_correlated_features(
+        feature_matrix.copy(), pct_corr_threshold=0.9
+    )
+    assert len(expected.columns) < feature_matrix.shape[1]
+    for memory_limit in [1, 2**20]:
+        dropped = correlated_columns(
+            lambda start, stop: feature_matrix.iloc[:, start:stop].to_numpy(
+                dtype=float
+            ),
+            feature_matrix.shape[1],
+            len(feature_matrix),
+            0.9,
+            memory_limit,
+        )
+        kept = [
+            name for i, name in enumerate(feature_matrix.columns) if i not in dropped
+        ]
+        assert kept == list(expected.columns)
+
+
+def test_features_are_cached_per_settings(tmp_path, monkeypatch):
+    reads = []
+    read_cached_features = featureeng.read_cached_features
+
+    def read_cached(cache_dir, key):
+        cached = read_cached_features(cache_dir, key)
+        reads.append((key, cached is not None))
+        return cached
+
+    monkeypatch.setattr(featureeng, "read_cached_features", read_cached)
+    sample = forest_cover_sample(400)
+    cache_dir = str(tmp_path)
+    first = make_new_features(sample, cache_dir, "abc", "fast")
+    second = make_new_features(sample, cache_dir, "abc", "fast")
+    assert list(first.columns) == list(second.columns)
+    assert np.array_equal(first.to_numpy(), second.to_numpy())
+    assert reads[0][1] is False and reads[1] == (reads[0][0], True)
+    assert stored_fingerprint(second) == reads[0][0]
+
+    make_new_features(sample, cache_dir, "abc", "fast", threshold=0.9)
+    make_new_features(sample, cache_dir, "abc", "auto")
+    make_new_features(sample, cache_dir, "abd", "fast")
+    keys = [key for key, _ in reads]
+    assert len(set(keys[1:])) == 4
+    assert not any(hit for _, hit in reads[2:])
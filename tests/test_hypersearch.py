@@ -0,0 +1,193 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.neighbors import KNeighborsClassifier
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover import hypersearch as search_module
+from forest_cover.hypersearch import parse_distributions, OUTER_FOLDS, INNER_FOLDS
+from forest_cover.ml import CONFIG_DEFAULTS
+from forest_cover.synthetic import make_dataset, TARGET_COLUMN
+from forest_cover.pipeline import create_pipeline
+from forest_cover.cachehandler import TransformerCache
+
+
+def test_parse_distributions():
+    parsed = parse_distributions(
+        {"clf__C": "loguniform(0.001,100)", "clf__leaf_size": [10, 20]}
+    )
+    assert parsed["clf__leaf_size"] == [10, 20]
+    assert 0.001 <= parsed["clf__C"].rvs(random_state=0) <= 100
+    assert parse_distributions({"a": "uniform(2,5)"})["a"].support() == (2, 5)
+
+
+@pytest.mark.parametrize("value", ["normal(0,1)", "randint(1", "loguniform()"])
+def test_parse_distributions_wrong_input(value):
+    with pytest.raises(ValueError):
+        parse_distributions({"clf__C": value})
+
+
+def test_transformer_cache(tmp_path):
+    cache = TransformerCache(str(tmp_path), 2**20)
+    cache.start()
+    X, y = make_classification(random_state=0)
+    for n_neighbors in [3, 5, 7]:
+        create_pipeline(
+            "standard", "pca", KNeighborsClassifier(n_neighbors), cache
+        ).fit(X, y)
+    assert cache.finish() == (4, 6)
+
+
+def test_transformer_caches_count_hits_separately(tmp_path):
+    X, y = make_classification(random_state=0)
+    first = TransformerCache(str(tmp_path), 2**20)
+    second = TransformerCache(str(tmp_path), 2**20)
+    first.start()
+    second.start()
+    create_pipeline("standard", "none", KNeighborsClassifier(), first).fit(X, y)
+    assert second.finish() == (0, 0)
+    create_pipeline("standard", "none", KNeighborsClassifier(), first).fit(X, y)
+    assert first.finish() == (1, 2)
+
+
+def test_nested_searches_are_reused(tmp_path, monkeypatch):
+    searches = []
+    aggregate = search_module.best_candidate
+
+    def best_candidate(outer_searches):
+        searches.extend(outer_searches)
+        return aggregate(outer_searches)
+
+    monkeypatch.setattr(search_module, "best_candidate", best_candidate)
+    dataset = make_dataset(240)
+    data = dataset.drop(columns=TARGET_COLUMN), dataset[TARGET_COLUMN]
+    config = {
+        **CONFIG_DEFAULTS,
+        "model": "knn",
+        "jobs": 2,
+        "pipecache": 0,
+        "cachedir": str(tmp_path),
+    }
+    grid = {"clf__n_neighbors": [1, 5, 15]}
+    best_params, scores, final, fits, _ = search_module.hypersearch(config, data, grid)
+
+    assert len(searches) == OUTER_FOLDS
+    assert fits == OUTER_FOLDS * (len(grid["clf__n_neighbors"]) * INNER_FOLDS + 1) + 1
+    assert fits == sum(search_module.count_fits(search) for search in searches) + 1
+    means = {
+        n: np.mean(
+            [
+                search.cv_results_["mean_test_score"][
+                    search.cv_results_["param_clf__n_neighbors"].tolist().index(n)
+                ]
+                for search in searches
+            ]
+        )
+        for n in grid["clf__n_neighbors"]
+    }
+    assert best_params == {"clf__n_neighbors": max(means, key=means.get)}
+    assert final.get_params()["clf__n_neighbors"] == best_params["clf__n_neighbors"]
+    assert len(scores["test_balanced_accuracy"]) == OUTER_FOLDS
+
+
+@pytest.fixture
+def outer_searches(monkeypatch):
+    searches = []
+    aggregate = search_module.best_candidate
+
+    def best_candidate(outer):
+        searches.extend(outer)
+        return aggregate(outer)
+
+    monkeypatch.setattr(search_module, "best_candidate", best_candidate)
+    return searches
+
+
+def search_setup(tmp_path, model):
+    dataset = make_dataset(240)
+    config = {
+        **CONFIG_DEFAULTS,
+        "model": model,
+        "jobs": 2,
+        "pipecache": 0,
+        "cachedir": str(tmp_path),
+    }
+    return config, (dataset.drop(columns=TARGET_COLUMN), dataset[TARGET_COLUMN])
+
+
+def test_random_search_samples_budget(tmp_path, outer_searches):
+    config, data = search_setup(tmp_path, "knn")
+    grid = {"clf__n_neighbors": [1, 3, 5, 7, 9, 11]}
+    best_params, scores, final, fits, _ = search_module.hypersearch(
+        config, data, grid, "random", 4
+    )
+
+    assert len(outer_searches) == OUTER_FOLDS
+    assert all(len(search.cv_results_["params"]) == 4 for search in outer_searches)
+    assert fits == OUTER_FOLDS * (4 * INNER_FOLDS + 1) + 1
+    assert best_params["clf__n_neighbors"] in grid["clf__n_neighbors"]
+    assert final.get_params()["clf__n_neighbors"] == best_params["clf__n_neighbors"]
+    assert len(scores["test_balanced_accuracy"]) == OUTER_FOLDS
+
+
+def test_forest_halving_grows_trees(tmp_path, outer_searches):
+    config, data = search_setup(tmp_path, "forest")
+    grid = {
+        "clf__n_estimators": [90],
+        "clf__max_depth": [1, 2, 3, 4, 5, 6, 7, 8, None],
+        "clf__max_features": ["sqrt"],
+    }
+    best_params, _, final, fits, _ = search_module.hypersearch(
+        config, data, grid, "halving", 9
+    )
+
+    assert len(outer_searches) == OUTER_FOLDS
+    last = []
+    for search in outer_searches:
+        assert search.resource == "clf__n_estimators"
+        assert search.n_resources_ == [10, 30, 90]
+        assert search.n_candidates_ == [9, 3, 1]
+        results = search.cv_results_
+        last += [
+            params
+            for params, iteration in zip(results["params"], results["iter"])
+            if iteration == 2
+        ]
+    assert best_params in last
+    assert best_params["clf__n_estimators"] == 90
+    assert final.get_params()["clf__n_estimators"] == 90
+    assert fits == sum(search_module.count_fits(s) for s in outer_searches) + 1
+
+
+def test_halving_rejects_estimators_only_grid():
+    with pytest.raises(ValueError):
+        search_module.halving_resource("forest", {"clf__n_estimators": [50]}, 9)
+    parameters, resource = search_module.halving_resource(
+        "forest", {"clf__n_estimators": [50, 150], "clf__max_depth": [2, 4, 6]}, 9
+    )
+    assert parameters == {"clf__max_depth": [2, 4, 6]}
+    assert resource == {
+        "resource": "clf__n_estimators",
+        "min_resources": 50,
+        "max_resources": 150,
+    }
+
+
+def test_best_candidate_uses_last_iteration():
+    def halving(scores):
+        return SimpleNamespace(
+            cv_results_={
+                "params": [{"a": 1}, {"a": 2}, {"a": 2}],
+                "mean_test_score": np.array(scores),
+                "iter": np.array([0, 0, 1]),
+            }
+        )
+
+    # {"a": 1} scores best, but only on the short first iteration
+    searches = [halving([0.99, 0.5, 0.6]), halving([0.98, 0.4, 0.7])]
+    assert search_module.best_candidate(searches) == {"a": 2}
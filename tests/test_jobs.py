@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.jobs import JobQueue, JobCancelled
+
+
+def test_job_queue_progress_and_output():
+    notices = []
+    queue = JobQueue(notices.append)
+
+    def func(output, progress):
+        for _ in range(3):
+            progress.report("fold")
+        output("готово")
+
+    job = queue.submit("test", func, {"fold": 3})
+    job.future.result(timeout=10)
+    assert job.status() == "завершена"
+    assert job.messages == ["готово"]
+    assert job.stages() == "фолдов: 3/3"
+    assert len(notices) == 1 and notices[0].startswith("Задача 1 ")
+    queue.shutdown()
+
+
+def test_job_queue_cancel():
+    queue = JobQueue(lambda message: None)
+    started = threading.Event()
+
+    def func(output, progress):
+        started.set()
+        while True:
+            progress.report("candidate")
+
+    running = queue.submit("running", func)
+    queued = queue.submit("queued", func)
+    assert started.wait(10)
+    assert queue.cancel(queued.id)
+    assert queue.cancel(running.id)
+    with pytest.raises(JobCancelled):
+        running.future.result(timeout=10)
+    assert running.status() == queued.status() == "отменена"
+    assert not queue.cancel(running.id)
+    with pytest.raises(KeyError):
+        queue.get(3)
+    queue.shutdown()
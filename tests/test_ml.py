@@ -4,6 +4,7 @@ import pytest
 
 import sys
 import os
+import subprocess
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),  '../src/')))
 from forest_cover.ml import MLApp
@@ -16,6 +17,7 @@ EXC_VALUEERROR = "ValueError"
 EXC_KEYERROR = "KeyError"
 TXT_RANDOMSTATE = "Число должно быть положительным"
 TXT_FEATENGDONE = "Feature engineering уже проведен"
+LAZY_MODULES = ["sklearn", "mlflow", "featuretools", "pandas", "joblib", "scipy"]
 
 
 class AppTester(cmd2_ext_test.ExternalTestMixin, MLApp):
@@ -105,3 +107,27 @@ def test_wrong_train_parameters_badsyntax(ml_app):
     ml_app.app_cmd("setmodel logit")
     out = ml_app.app_cmd("train -intercept_scaling 1")
     assert EXC_VALUEERROR in out.stderr
+
+
+def test_startup_imports():
+    script = (
+        "import sys; from forest_cover.ml import MLApp; MLApp(); "
+        "print(' '.join({name.split('.')[0] for name in sys.modules}))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.join(os.path.dirname(__file__), "../src/"),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = result.stdout.splitlines()[-1]
+    assert not set(LAZY_MODULES) & set(modules.split())
+
+
+def test_halving_estimators_only_grid(ml_app):
+    ml_app.app_cmd("setmodel forest")
+    out = ml_app.app_cmd('hypersearch -s halving -p {"n_estimators":[50,100]}')
+    assert isinstance(out, CommandResult)
+    assert "n_estimators служит ресурсом" in out.stdout
+    assert "Оцениваем" not in out.stdout
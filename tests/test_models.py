@@ -0,0 +1,32 @@
+import pytest
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.models import create_model, MODELS
+from forest_cover.pipeline import create_pipeline
+
+
+@pytest.mark.parametrize("model", list(MODELS))
+def test_create_model_fresh_instances(model):
+    first = create_model(model)
+    assert first is not create_model(model)
+    assert first.get_params() == create_model(model).get_params()
+
+
+def test_create_model_parameters():
+    assert create_model("logit").max_iter == 1000
+    assert create_model("logit", {"C": 0.5}).get_params()["max_iter"] == 1000
+    create_model("knn", {"n_neighbors": 3})
+    assert create_model("knn").n_neighbors == 5
+    with pytest.raises(ValueError):
+        create_model("knn", {"unknown": 1})
+
+
+def test_create_pipeline_fresh_steps():
+    first = create_pipeline("standard", "pca", create_model("logit"))
+    second = create_pipeline("standard", "pca", create_model("logit"))
+    first.set_params(sca__with_mean=False, dmr__n_components=2)
+    assert second.get_params()["sca__with_mean"]
+    assert second.get_params()["dmr__n_components"] is None
@@ -0,0 +1,33 @@
+import pandas as pd
+from sklearn.tree import DecisionTreeClassifier
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.predict import predict_file
+
+
+def test_predict_file_chunked(tmp_path):
+    data = pd.DataFrame(
+        {
+            "Id": range(1, 11),
+            "Elevation": [2596, 2590, 2804, 2785, 2595, 2579, 2606, 2605, 2617, 2612],
+            "Cover_Type": [5, 5, 2, 2, 5, 2, 5, 5, 5, 5],
+        }
+    )
+    input_file = tmp_path / "test.csv"
+    output_file = tmp_path / "predictions.csv"
+    data.to_csv(input_file, index=False)
+    features = data.drop(columns="Cover_Type")
+    model = DecisionTreeClassifier(random_state=0).fit(features, data["Cover_Type"])
+    messages = []
+    rows = predict_file(
+        model, str(input_file), str(output_file), "Cover_Type", 3, True, messages.append
+    )
+    predictions = pd.read_csv(output_file)
+    assert rows == 10
+    assert len(messages) == 4
+    assert predictions["Id"].tolist() == data["Id"].tolist()
+    assert predictions["prediction"].tolist() == model.predict(features).tolist()
+    assert list(predictions.columns) == ["Id", "prediction", "proba_2", "proba_5"]
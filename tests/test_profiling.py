@@ -0,0 +1,41 @@
+import numpy as np
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.profiling import StepTimer, profile_scoring, add_profile
+from forest_cover.profiling import profile_summary, profile_metrics
+from forest_cover.pipeline import create_pipeline
+from forest_cover.models import create_model
+
+
+def test_step_timings_from_cross_validation():
+    from sklearn.model_selection import cross_validate
+
+    features = np.random.RandomState(0).rand(60, 4)
+    target = np.arange(60) % 2
+    model = create_model("logit")
+    timer = StepTimer()
+    pipeline = create_pipeline("standard", "pca", model, memory=timer)
+    scores = cross_validate(
+        pipeline, features, target, cv=3, scoring=profile_scoring(["accuracy"])
+    )
+    add_profile(scores, timer, model, 3, 1.0, 3, float(np.sum(scores["score_time"])))
+    timer.remove()
+
+    assert list(scores["steps"]) == [
+        "StandardScaler",
+        "PCA",
+        "LogisticRegression",
+        "scoring",
+    ]
+    assert [count for count, _ in scores["steps"].values()] == [3, 3, 3, 3]
+    assert len(scores["peak_rss"]) == 3 and "test_peak_rss" not in scores
+    metrics = profile_metrics(scores)
+    assert metrics["fit_time"] == float(np.sum(scores["fit_time"]))
+    assert {"time_PCA", "time_LogisticRegression", "time_scoring"} <= set(metrics)
+    lines = profile_summary(scores, "Фолды", "Шаги")
+    assert lines[0] == "Фолды:" and lines[5] == "Шаги:"
+    assert lines[1].split()[:3] == ["фолд", "обучение,", "с"]
+    assert lines[8].startswith("PCA ")
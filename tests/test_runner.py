@@ -0,0 +1,57 @@
+import pytest
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.ml import CONFIG_DEFAULTS
+from forest_cover.runner import expand_runs, main
+
+
+def test_expand_runs():
+    runs = expand_runs(
+        {
+            "config": {"eval": 3},
+            "matrix": {"model": ["logit", "knn"], "scaler": ["none", "standard"]},
+            "params": {"knn": {"n_neighbors": 10}},
+            "runs": [{"model": "knn", "dimreduct": "pca", "params": {"p": 1}}],
+        },
+        CONFIG_DEFAULTS,
+    )
+    assert [run["name"] for run in runs] == [
+        "logit-none-none-none",
+        "logit-standard-none-none",
+        "knn-none-none-none",
+        "knn-standard-none-none",
+        "knn-none-pca-none",
+    ]
+    assert all(run["eval"] == 3 for run in runs)
+    assert runs[2]["params"] == {"n_neighbors": 10}
+    assert runs[4]["params"] == {"n_neighbors": 10, "p": 1}
+    assert len({run["dumppath"] for run in runs}) == 5
+
+
+def test_invalid_matrix_values_rejected(tmp_path, capsys):
+    experiments = {
+        "matrix": {"model": ["logit", "lgoit"], "feateng": ["none", "fats"]},
+        "runs": [{"model": "lgoit"}],
+    }
+    with pytest.raises(ValueError) as error:
+        expand_runs(experiments, CONFIG_DEFAULTS)
+    message = str(error.value)
+    assert message.count("model: lgoit") == 1
+    assert "feateng: fats (допустимые значения: none, auto, fast)" in message
+
+    path = tmp_path / "experiments.yaml"
+    path.write_text(
+        f"config: {{loadpath: {tmp_path / 'missing.csv'}}}\n"
+        "matrix:\n  model: [lgoit, forest]\n"
+        "params:\n  forest: {n_estimatorz: 5, max_depth: 3}\n",
+        encoding="utf-8",
+    )
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(path)], CONFIG_DEFAULTS)
+    assert exit_info.value.code == 2
+    error = capsys.readouterr().err
+    assert "model: lgoit" in error
+    assert "params forest: n_estimatorz (нет у модели)" in error
@@ -0,0 +1,36 @@
+import pytest
+from joblib import Parallel
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.scheduler import split_budget, limit_threads, limit_worker_threads
+
+
+@pytest.mark.parametrize(
+    "cores, outer_tasks, inner_tasks, expected",
+    [
+        (64, 8, 24, (8, 8, 1)),
+        (64, 8, 4, (8, 4, 2)),
+        (64, 6, 1, (6, 1, 10)),
+        (4, 8, 24, (4, 1, 1)),
+        (1, 5, 1, (1, 1, 1)),
+    ],
+)
+def test_split_budget(cores, outer_tasks, inner_tasks, expected):
+    outer, inner, threads = split_budget(cores, outer_tasks, inner_tasks)
+    assert (outer, inner, threads) == expected
+    assert outer * inner * threads <= cores
+
+
+def preferred_backend():
+    with Parallel(n_jobs=2, prefer="threads") as parallel:
+        return type(parallel._backend).__name__
+
+
+def test_thread_limits_keep_threading_hint():
+    with limit_threads(2), limit_worker_threads(1, 2):
+        assert preferred_backend() == "ThreadingBackend"
+    with limit_worker_threads(2, 2):
+        assert preferred_backend() == "LokyBackend"
@@ -0,0 +1,58 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pandas as pd
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.serve import make_server
+
+
+@pytest.fixture
+def server():
+    features = pd.DataFrame(
+        {"Elevation": [2596, 2590, 2804, 2785], "Slope": [3, 2, 9, 18]}
+    )
+    model = DecisionTreeClassifier(random_state=0).fit(features, [5, 5, 2, 2])
+    server, batcher = make_server(model, "127.0.0.1", 0, 8, 0.05)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", batcher
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, body):
+    request = Request(url, json.dumps(body).encode("utf-8"), method="POST")
+    with urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def test_serve_micro_batches(server):
+    url, batcher = server
+    rows = [{"Elevation": 2590 + i * 20, "Slope": i} for i in range(16)]
+    with ThreadPoolExecutor(16) as executor:
+        responses = list(executor.map(lambda row: post(f"{url}/predict", row), rows))
+    expected = batcher.model.predict(pd.DataFrame(rows))
+    assert [r["prediction"] for r in responses] == [[p] for p in expected.tolist()]
+    stats = json.loads(urlopen(f"{url}/stats").read())
+    assert stats["requests"] == 16
+    assert max(int(size) for size in stats["batches"]) > 1
+    assert stats["p50_ms"] <= stats["p99_ms"]
+    proba = post(f"{url}/predict?proba", rows[:2])
+    assert proba["proba"][0] == {"2": 0.0, "5": 1.0}
+
+
+def test_serve_missing_column(server):
+    url, _ = server
+    with pytest.raises(HTTPError) as error:
+        post(f"{url}/predict", {"Elevation": 2596})
+    assert error.value.code == 400
+    assert "Slope" in json.loads(error.value.read())["error"]
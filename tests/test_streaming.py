@@ -0,0 +1,80 @@
+import numpy as np
+from sklearn.naive_bayes import GaussianNB
+from sklearn.metrics import balanced_accuracy_score, f1_score, roc_auc_score
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.ml import CONFIG_DEFAULTS
+from forest_cover.datahandler import load_data, dataset_fingerprint
+from forest_cover.models import create_model
+from forest_cover.pipeline import create_streaming_pipeline
+from forest_cover.streaming import stream_train, holdout_keys
+from forest_cover.synthetic import write_dataset, TARGET_COLUMN
+
+
+def test_holdout_does_not_depend_on_chunks():
+    keys = holdout_keys(0, 10, 42)
+    assert np.array_equal(
+        keys, np.concatenate([holdout_keys(0, 4, 42), holdout_keys(4, 6, 42)])
+    )
+    assert ((keys >= 0) & (keys < 1)).all()
+    assert not np.array_equal(keys, holdout_keys(0, 10, 7))
+
+
+def test_stream_train_matches_in_memory_metrics(tmp_path):
+    path = str(tmp_path / "data.csv")
+    write_dataset(path, 5000)
+    config = {**CONFIG_DEFAULTS, "loadpath": path, "model": "sgd"}
+    pipeline = create_streaming_pipeline(
+        "standard", "pca", create_model("sgd", {"random_state": 0})
+    )
+    scores = stream_train(pipeline, config, 1000, 0.2, 2, output=lambda _: None)
+
+    features, target = load_data(path, TARGET_COLUMN)
+    held_out = holdout_keys(0, len(features), config["randomstate"]) < 0.2
+    assert scores["rows"] == (int((~held_out).sum()), int(held_out.sum()))
+    assert scores["fingerprint"] == dataset_fingerprint(features)
+    predicted = pipeline.predict(features[held_out])
+    proba = pipeline.predict_proba(features[held_out])
+    assert np.isclose(
+        scores["test_balanced_accuracy"][0],
+        balanced_accuracy_score(target[held_out], predicted),
+    )
+    assert np.isclose(
+        scores["test_f1_weighted"][0],
+        f1_score(target[held_out], predicted, average="weighted"),
+    )
+    assert np.isclose(
+        scores["test_roc_auc_ovo_weighted"][0],
+        roc_auc_score(target[held_out], proba, multi_class="ovo", average="weighted"),
+    )
+    assert set(scores["steps"]) == {
+        "StandardScaler",
+        "IncrementalPCA",
+        "SGDClassifier",
+        "scoring",
+    }
+
+
+BATCHES = []
+
+
+class RecordingNB(GaussianNB):
+    def partial_fit(self, X, y, classes=None, sample_weight=None):
+        BATCHES.append(X["Id"].tolist())
+        return super().partial_fit(X, y, classes, sample_weight)
+
+
+def test_epochs_shuffle_rows_differently(tmp_path):
+    path = str(tmp_path / "data.csv")
+    write_dataset(path, 3000)
+    config = {**CONFIG_DEFAULTS, "loadpath": path, "model": "nb"}
+    BATCHES.clear()
+    pipeline = create_streaming_pipeline("none", "none", RecordingNB())
+    stream_train(pipeline, config, 1000, 0.2, 2, output=lambda _: None)
+    assert len(BATCHES) == 6
+    for first, second in zip(BATCHES[:3], BATCHES[3:]):
+        assert sorted(first) == sorted(second)
+        assert first != second
@@ -0,0 +1,49 @@
+import sys
+import os
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.synthetic import (
+    make_dataset,
+    write_dataset,
+    CLASS_PROFILES,
+    COLUMNS,
+    TARGET_COLUMN,
+)
+from forest_cover.datahandler import FLAG_COLUMNS, NUMERIC_COLUMNS, matches_schema
+
+
+def test_dataset_schema():
+    dataset = make_dataset(1000, random_state=1)
+    assert list(dataset.columns) == COLUMNS
+    assert len(COLUMNS) == 56
+    assert dataset["Id"].tolist() == list(range(1, 1001))
+    assert set(dataset[TARGET_COLUMN]) == set(range(1, 8))
+    assert (dataset[FLAG_COLUMNS[:4]].sum(axis=1) == 1).all()
+    assert (dataset[FLAG_COLUMNS[4:]].sum(axis=1) == 1).all()
+    assert dataset.equals(make_dataset(1000, random_state=1))
+    assert list(CLASS_PROFILES) == NUMERIC_COLUMNS
+
+
+def test_write_dataset_in_chunks(tmp_path):
+    path = str(tmp_path / "generated.csv")
+    assert write_dataset(path, 250, random_state=3, chunksize=100) == 250
+    written = pd.read_csv(path)
+    expected = pd.concat(
+        [
+            make_dataset(100, [3, 0], 1),
+            make_dataset(100, [3, 1], 101),
+            make_dataset(50, [3, 2], 201),
+        ],
+        ignore_index=True,
+    )
+    pd.testing.assert_frame_equal(written, expected)
+
+
+def test_matches_schema():
+    features = make_dataset(100).drop(columns=TARGET_COLUMN)
+    assert matches_schema(features)
+    assert not matches_schema(features.drop(columns="Slope"))
+    features.loc[0, FLAG_COLUMNS[0]] = 2
+    assert not matches_schema(features)
@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.tracking import RunLog, submit_run, flush
+from forest_cover.models import create_model
+
+
+@pytest.fixture
+def tracking_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", (tmp_path / "mlruns").as_uri())
+    monkeypatch.setenv("MLFLOW_ALLOW_FILE_STORE", "true")
+
+
+def test_batched_run_with_model(tracking_dir):
+    from mlflow.tracking import MlflowClient
+
+    model = create_model("tree").fit([[0], [1], [0], [1]], [0, 1, 0, 1])
+    log = RunLog("tree (test)")
+    log.log_params({"SCALER": "none", "max_depth": None})
+    log.set_tags({"dataset_fingerprint": "44b7913f39ca"})
+    log.log_metrics({"accuracy_balanced": 0.5})
+    for fold in range(3):
+        log.log_metrics({"accuracy_balanced_fold": fold / 10}, step=fold)
+    submit_run(log, model, "tree")
+    submit_run(RunLog("tree (no model)"))
+    assert flush() == []
+
+    client = MlflowClient()
+    runs = client.search_runs(["0"], order_by=["attributes.start_time"])
+    assert [run.info.run_name for run in runs] == ["tree (test)", "tree (no model)"]
+    run = runs[0]
+    assert run.info.status == "FINISHED"
+    assert run.data.params == {"SCALER": "none", "max_depth": "None"}
+    assert run.data.tags["dataset_fingerprint"] == "44b7913f39ca"
+    history = client.get_metric_history(run.info.run_id, "accuracy_balanced_fold")
+    assert [(m.step, m.value) for m in history] == [(0, 0.0), (1, 0.1), (2, 0.2)]
+    assert [a.path for a in client.list_artifacts(run.info.run_id)] == ["tree"]
+    assert client.list_artifacts(runs[1].info.run_id) == []
+
+
+def test_failed_run_reported(tracking_dir):
+    from mlflow.tracking import MlflowClient
+
+    submit_run(RunLog("broken"), threading.Lock(), "model")
+    errors = flush()
+    assert len(errors) == 1 and errors[0].startswith("broken: ")
+    assert MlflowClient().search_runs(["0"])[0].info.status == "FAILED"
+
+
+def test_large_run_split_into_batches(tracking_dir, monkeypatch):
+    from mlflow.tracking import MlflowClient
+
+    monkeypatch.setenv("MLFLOW_EXPERIMENT_NAME", "grid")
+    batches = []
+    log_batch = MlflowClient.log_batch
+
+    def spy(self, run_id, metrics=(), params=(), **kwargs):
+        batches.append((len(metrics), len(params)))
+        return log_batch(self, run_id, metrics=metrics, params=params, **kwargs)
+
+    monkeypatch.setattr(MlflowClient, "log_batch", spy)
+    log = RunLog("knn (grid)")
+    log.log_params({f"param_{i}": i for i in range(150)})
+    for step in range(3):
+        log.log_metrics({f"metric_{i}": i for i in range(700)}, step=step)
+    submit_run(log)
+    assert flush() == []
+
+    assert all(metrics <= 1000 and params <= 100 for metrics, params in batches)
+    assert sum(metrics for metrics, _ in batches) == 2100
+    assert sum(params for _, params in batches) == 150
+    client = MlflowClient()
+    experiment = client.get_experiment_by_name("grid")
+    run = client.search_runs([experiment.experiment_id])[0]
+    assert len(run.data.params) == 150
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from joblib import load
+from sklearn.base import clone
+from sklearn.model_selection import KFold, cross_validate
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.ml import CONFIG_DEFAULTS
+from forest_cover.models import create_model
+from forest_cover.pipeline import create_pipeline
+from forest_cover.synthetic import make_dataset, TARGET_COLUMN
+from forest_cover.tracking import flush
+from forest_cover.train import train, SCORING
+
+
+@pytest.fixture
+def tracking_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", (tmp_path / "mlruns").as_uri())
+    monkeypatch.setenv("MLFLOW_ALLOW_FILE_STORE", "true")
+
+
+@pytest.mark.parametrize("folds", [3, 4])
+def test_train_exports_pipeline_fitted_on_all_rows(tmp_path, tracking_dir, folds):
+    from mlflow.tracking import MlflowClient
+
+    dataset = make_dataset(300)
+    features, target = dataset.drop(columns=TARGET_COLUMN), dataset[TARGET_COLUMN]
+    config = {
+        **CONFIG_DEFAULTS,
+        "model": "logit",
+        "scaler": "standard",
+        "eval": folds,
+        "jobs": 2,
+        "logmodel": False,
+        "dumppath": str(tmp_path / "model.joblib"),
+        "cachedir": str(tmp_path / "cache"),
+    }
+    pipeline = create_pipeline("standard", "none", create_model("logit"))
+    scores = train(pipeline, (features, target), {}, config)
+    assert flush() == []
+
+    exported = load(config["dumppath"])
+    full = clone(pipeline).fit(features, target)
+    assert np.allclose(exported.steps[-1][1].coef_, full.steps[-1][1].coef_)
+
+    reference = cross_validate(
+        pipeline,
+        features,
+        target,
+        cv=KFold(n_splits=folds, shuffle=True, random_state=config["randomstate"]),
+        scoring=SCORING,
+    )
+    for name in SCORING:
+        assert len(scores[f"test_{name}"]) == folds
+        assert np.allclose(scores[f"test_{name}"], reference[f"test_{name}"])
+
+    client = MlflowClient()
+    run = client.search_runs(["0"])[0]
+    history = client.get_metric_history(run.info.run_id, "accuracy_balanced_fold")
+    assert [metric.step for metric in history] == list(range(folds))
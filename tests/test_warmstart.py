@@ -0,0 +1,66 @@
+import numpy as np
+from sklearn.model_selection import KFold
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/")))
+from forest_cover.ml import CONFIG_DEFAULTS
+from forest_cover.models import create_model
+from forest_cover.pipeline import create_pipeline
+from forest_cover.profiling import StepTimer, profile_scoring
+from forest_cover.synthetic import make_dataset, TARGET_COLUMN
+from forest_cover.warmstart import warm_validate, clear_warm_cache, WARM_CACHE_SIZE
+
+
+def validate(data, config, parameters):
+    pipeline = create_pipeline(
+        config["scaler"], "none", create_model(config["model"], parameters)
+    )
+    timer = StepTimer()
+    try:
+        return warm_validate(
+            pipeline,
+            data,
+            config,
+            KFold(n_splits=config["eval"], shuffle=True, random_state=1),
+            profile_scoring(["balanced_accuracy"]),
+            timer,
+        )
+    finally:
+        timer.remove()
+
+
+def test_forest_grows_from_cached_folds():
+    clear_warm_cache()
+    dataset = make_dataset(300)
+    data = dataset.drop(columns=TARGET_COLUMN), dataset[TARGET_COLUMN]
+    config = {**CONFIG_DEFAULTS, "model": "forest", "eval": 3, "warmstart": True}
+    parameters = {"max_features": "sqrt", "random_state": 0}
+    scores, _ = validate(data, config, {**parameters, "n_estimators": 5})
+    assert scores["warm_folds"] == 0
+    scores, final = validate(data, config, {**parameters, "n_estimators": 15})
+    assert scores["warm_folds"] == 3
+    assert len(final.steps[-1][1].estimators_) == 15
+    clear_warm_cache()
+    cold_scores, _ = validate(data, config, {**parameters, "n_estimators": 15})
+    assert np.allclose(
+        scores["test_balanced_accuracy"], cold_scores["test_balanced_accuracy"]
+    )
+    # fewer trees than cached cannot be warm-started
+    scores, _ = validate(data, config, {**parameters, "n_estimators": 10})
+    assert scores["warm_folds"] == 0
+
+
+def test_cache_is_bounded():
+    clear_warm_cache()
+    dataset = make_dataset(200)
+    data = dataset.drop(columns=TARGET_COLUMN), dataset[TARGET_COLUMN]
+    config = {**CONFIG_DEFAULTS, "model": "logit", "eval": 2, "warmstart": True}
+    for scaler in ["none", "standard", "minmax", "maxabs", "robust"]:
+        validate(data, {**config, "scaler": scaler}, {"C": 1.0})
+    scores, _ = validate(data, {**config, "scaler": "robust"}, {"C": 0.1})
+    assert scores["warm_folds"] == 2
+    scores, _ = validate(data, {**config, "scaler": "none"}, {"C": 0.1})
+    assert scores["warm_folds"] == 0
+    assert clear_warm_cache() == WARM_CACHE_SIZE